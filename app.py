@@ -1,12 +1,38 @@
+import io
 import os
+import re
+import csv
+import glob
+import atexit
 import json
-import io
+import math
+import tempfile
+import time
 import uuid
-from datetime import datetime, timedelta
+import bisect
+import heapq
+import itertools
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import closing
+from types import MappingProxyType
+from datetime import datetime, timedelta, time as dt_time
+from zoneinfo import ZoneInfo
+import click
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from openpyxl import Workbook
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
 import requests
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash, jsonify
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, render_template, stream_template, request, redirect, url_for, send_file, flash, get_flashed_messages, jsonify
 
 # --- APP SETUP ---
 app = Flask(__name__)
@@ -24,52 +50,1295 @@ EXPENSE_CATEGORIES = [
     "Entertainment", "Shopping", "Health & Wellness", "Education", "Travel",
     "Investment Transfer", "Charity", "Other Expense"
 ]
+INVESTMENT_TYPES = ["Stock", "Mutual Fund", "ETF", "FD"]
+
+# --- STORAGE CONFIGURATION ---
+# 'json' keeps the JSON snapshot + journal files, 'sqlite' keeps everything in one indexed database.
+STORAGE_BACKEND = os.environ.get('FINTRACK_STORAGE', 'json')
+DATABASE_FILE = os.path.join(DATA_DIR, 'fintrack.db')
+
+# Inserts, edits and deletes are appended to a JSON-lines journal next to each data file
+# instead of rewriting the whole file: an edit carries the whole new record and a delete
+# is a tombstone naming the record's id. Once the journal grows past this many entries it
+# is folded back into the JSON snapshot on a background thread.
+JOURNAL_COMPACT_THRESHOLD = 1000
+# Deletes also trigger a background compaction once tombstones outnumber this share of the
+# live records, so reads don't keep filtering out a large deleted fraction.
+TOMBSTONE_COMPACT_RATIO = 0.2
+
+# Record fields each dataset exposes to the storage layer for filtering, sorting and sums.
+DATASET_FIELDS = {
+    TRANSACTIONS_FILE: {'date': 'date', 'type': 'type', 'category': 'category', 'amount': 'amount'},
+    INVESTMENTS_FILE: {'date': 'purchase_date', 'type': 'type', 'category': 'ticker', 'amount': 'amount_invested'},
+}
+
+# --- STORAGE BACKENDS ---
+class JsonStorage:
+    """Each dataset is a JSON snapshot plus an append-only JSON-lines journal."""
+
+    def __init__(self):
+        self._journal_sizes = {}
+        self._tombstones = {}
+        # Held while the snapshot and journal change together, so a background compaction
+        # never races a write or shows a reader a half-swapped pair.
+        self._lock = threading.RLock()
+
+    def setup(self):
+        if not os.path.exists(DATA_DIR):
+            os.makedirs(DATA_DIR)
+        for file_path in DATASET_FIELDS:
+            if not os.path.exists(file_path):
+                with open(file_path, 'w') as f: json.dump([], f)
+
+    def signature(self, file_path):
+        # Under the lock so it never pairs a swapped-in snapshot with the old journal.
+        with self._lock: return (file_stamp(file_path), file_stamp(self.journal_path(file_path)))
+
+    def journal_path(self, file_path):
+        return os.path.splitext(file_path)[0] + '.jsonl'
+
+    def read_journal(self, file_path, end=None):
+        """Yields the entries of a data file's journal (its first `end` bytes, if given),
+        skipping a torn trailing line."""
+        path = self.journal_path(file_path)
+        if not os.path.exists(path): return
+        with open(path, 'r') as f:
+            for line in (f.read(end).splitlines() if end is not None else f):
+                line = line.strip()
+                if not line: continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping corrupt journal entry in {path}")
+
+    def load(self, file_path):
+        with self._lock: return self._read(file_path)
+
+    def _read(self, file_path, journal_end=None):
+        with open(file_path, 'r') as f: data = json.load(f)
+        updated, deleted = {}, set()
+        for entry in self.read_journal(file_path, journal_end):
+            if entry.get('op') == 'add': data.extend(entry['records']) if 'records' in entry else data.append(entry['record'])
+            elif entry.get('op') == 'update': updated[entry['record']['id']] = entry['record']
+            elif entry.get('op') == 'delete': deleted.add(entry['id'])
+        if not updated and not deleted: return data
+        return [updated.get(r.get('id'), r) for r in data if r.get('id') not in deleted]
+
+    @staticmethod
+    def _write_snapshot(path, data):
+        # One record per line: still readable, and unlike indent= it uses the C encoder.
+        with open(path, 'w') as f: f.write('[\n' + ',\n'.join(json.dumps(r, default=dict) for r in data) + '\n]\n' if data else '[]\n')
+
+    def save(self, data, file_path):
+        # Write the snapshot atomically, then drop the journal it now contains.
+        tmp_path = file_path + '.tmp'
+        with self._lock:
+            self._write_snapshot(tmp_path, data)
+            os.replace(tmp_path, file_path)
+            if os.path.exists(self.journal_path(file_path)): os.remove(self.journal_path(file_path))
+            self._journal_sizes[file_path] = self._tombstones[file_path] = 0
+
+    @staticmethod
+    def _entry_size(entry):
+        return len(entry['records']) if 'records' in entry else 1
+
+    def _count_journal(self, file_path):
+        if file_path in self._journal_sizes: return
+        entries = list(self.read_journal(file_path))
+        self._journal_sizes[file_path] = sum(self._entry_size(entry) for entry in entries)
+        self._tombstones[file_path] = sum(entry.get('op') == 'delete' for entry in entries)
+
+    def _write_journal(self, entries, file_path):
+        with open(self.journal_path(file_path), 'a') as f:
+            f.write(''.join(json.dumps(entry, default=dict) + '\n' for entry in entries))
+        self._journal_sizes[file_path] += sum(self._entry_size(entry) for entry in entries)
+
+    def append(self, record, file_path):
+        self.append_many([record], file_path)
+
+    def append_many(self, records, file_path):
+        with self._lock:
+            self._count_journal(file_path)
+            # A batch is one journal line, encoded by a single json.dumps call; a torn
+            # write then drops the whole batch rather than part of it.
+            entry = {'op': 'add', 'records': records} if len(records) > 1 else {'op': 'add', 'record': records[0]}
+            self._write_journal([entry], file_path)
+
+    def begin_compaction(self, file_path, cached_records=None):
+        """Writes a new snapshot holding the snapshot and journal as they are now, and returns
+        the plan finish_compaction() swaps in. cached_records(signature) may return the records
+        for that signature, saving a re-parse. Only finding where the journal ends holds the
+        lock, so writes carry on while the new snapshot is written."""
+        with self._lock:
+            signature = self.signature(file_path)
+            journal_path = self.journal_path(file_path)
+            journal_end = os.path.getsize(journal_path) if os.path.exists(journal_path) else 0
+            records = cached_records(signature) if cached_records else None
+        if records is None: records = self._read(file_path, journal_end)
+        tmp_path = file_path + '.compact'
+        self._write_snapshot(tmp_path, records)
+        return {'file_path': file_path, 'snapshot': signature[0], 'journal_end': journal_end, 'tmp_path': tmp_path}
+
+    def finish_compaction(self, plan):
+        """Swaps in the snapshot from begin_compaction(), keeping only the journal entries written
+        since. Returns False, dropping it, if a save() replaced the snapshot meanwhile."""
+        file_path, tmp_path = plan['file_path'], plan['tmp_path']
+        with self._lock:
+            if file_stamp(file_path) != plan['snapshot']:
+                os.remove(tmp_path)
+                return False
+            journal_path = self.journal_path(file_path)
+            tail = ''
+            if os.path.exists(journal_path):
+                with open(journal_path, 'r') as f:
+                    f.seek(plan['journal_end'])
+                    tail = f.read()
+            os.replace(tmp_path, file_path)
+            if tail:
+                with open(journal_path + '.tmp', 'w') as f: f.write(tail)
+                os.replace(journal_path + '.tmp', journal_path)
+            elif os.path.exists(journal_path):
+                os.remove(journal_path)
+            # Recounted from the (short) remaining journal when next needed.
+            self._journal_sizes.pop(file_path, None)
+            self._tombstones.pop(file_path, None)
+            return True
+
+    def compact(self, file_path):
+        self.finish_compaction(self.begin_compaction(file_path))
+
+    def update(self, record, file_path):
+        with self._lock:
+            self._count_journal(file_path)
+            self._write_journal([{'op': 'update', 'record': record}], file_path)
+
+    def delete(self, record_id, file_path):
+        self.delete_many([record_id], file_path)
+
+    def delete_many(self, record_ids, file_path):
+        with self._lock:
+            self._count_journal(file_path)
+            self._write_journal([{'op': 'delete', 'id': record_id} for record_id in record_ids], file_path)
+            self._tombstones[file_path] += len(record_ids)
+
+    def needs_compaction(self, file_path, record_count):
+        with self._lock:
+            self._count_journal(file_path)
+            return self._journal_sizes[file_path] >= JOURNAL_COMPACT_THRESHOLD or self._tombstones[file_path] > TOMBSTONE_COMPACT_RATIO * record_count
+
+    def _filter(self, file_path, record_type, start_date, end_date):
+        """Matching records oldest first; the date range is a slice of the date index."""
+        type_field = DATASET_FIELDS[file_path]['type']
+        rows = get_date_index(file_path).between(start_date, end_date)
+        return [r for r in rows if r.get(type_field) == record_type] if record_type else rows
+
+    def query(self, file_path, record_type=None, start_date=None, end_date=None, newest_first=False):
+        rows = self._filter(file_path, record_type, start_date, end_date)
+        return rows[::-1] if newest_first else rows
+
+
+class SqliteStorage:
+    """Each dataset is a table with indexed date/type/category/id columns and the full record as JSON."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def signature(self, file_path):
+        # The table's own change counter, so a write to one dataset leaves the other's
+        # cache valid. The inode notices the database file being replaced wholesale.
+        stamp = file_stamp(self.db_path)
+        if stamp is None: return None
+        with self._connect() as conn:
+            try:
+                row = conn.execute("SELECT version FROM versions WHERE name = ?", (self._table(file_path),)).fetchone()
+            except sqlite3.OperationalError:
+                return None
+        return (stamp[2], row[0] if row else None)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path))
+
+    def _table(self, file_path):
+        return os.path.splitext(os.path.basename(file_path))[0]
+
+    def setup(self):
+        if not os.path.exists(DATA_DIR):
+            os.makedirs(DATA_DIR)
+        with self._connect() as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            for file_path in DATASET_FIELDS:
+                table = self._table(file_path)
+                conn.execute("INSERT OR IGNORE INTO versions (name, version) VALUES (?, 0)", (table,))
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE, date TEXT, type TEXT, category TEXT, amount REAL, data TEXT NOT NULL)")
+                for column in ('date', 'type', 'category'):
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+    def _row(self, record, file_path):
+        fields = DATASET_FIELDS[file_path]
+        return (record.get('id'), record.get(fields['date']), record.get(fields['type']), record.get(fields['category']), record.get(fields['amount']), json.dumps(record, default=dict))
+
+    def _bump(self, conn, file_path):
+        """Counts a write to file_path's table, in the transaction that makes it."""
+        conn.execute("UPDATE versions SET version = version + 1 WHERE name = ?", (self._table(file_path),))
+
+    def _insert(self, conn, records, file_path):
+        conn.executemany(f"INSERT INTO {self._table(file_path)} (id, date, type, category, amount, data) VALUES (?, ?, ?, ?, ?, ?)", [self._row(r, file_path) for r in records])
+
+    def load(self, file_path):
+        with self._connect() as conn:
+            return [json.loads(row[0]) for row in conn.execute(f"SELECT data FROM {self._table(file_path)} ORDER BY seq")]
+
+    def save(self, data, file_path):
+        with self._connect() as conn, conn:
+            conn.execute(f"DELETE FROM {self._table(file_path)}")
+            self._insert(conn, data, file_path)
+            self._bump(conn, file_path)
+
+    def append(self, record, file_path):
+        self.append_many([record], file_path)
+
+    def append_many(self, records, file_path):
+        with self._connect() as conn, conn:
+            self._insert(conn, records, file_path)
+            self._bump(conn, file_path)
+
+    def update(self, record, file_path):
+        with self._connect() as conn, conn:
+            conn.execute(f"UPDATE {self._table(file_path)} SET date = ?, type = ?, category = ?, amount = ?, data = ? WHERE id = ?", (*self._row(record, file_path)[1:], record['id']))
+            self._bump(conn, file_path)
+
+    def delete(self, record_id, file_path):
+        self.delete_many([record_id], file_path)
+
+    def delete_many(self, record_ids, file_path):
+        with self._connect() as conn, conn:
+            conn.executemany(f"DELETE FROM {self._table(file_path)} WHERE id = ?", [(record_id,) for record_id in record_ids])
+            self._bump(conn, file_path)
+
+    def needs_compaction(self, file_path, record_count):
+        # Rows are deleted in place; SQLite reuses their pages itself.
+        return False
+
+    def _where(self, record_type, start_date, end_date):
+        clauses, params = [], []
+        if record_type: clauses.append("type = ?"); params.append(record_type)
+        if start_date: clauses.append("date >= ?"); params.append(start_date)
+        if end_date: clauses.append("date <= ?"); params.append(end_date)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, file_path, record_type=None, start_date=None, end_date=None, newest_first=False):
+        where, params = self._where(record_type, start_date, end_date)
+        order = "date DESC, seq" if newest_first else "date, seq"
+        with self._connect() as conn:
+            return [json.loads(row[0]) for row in conn.execute(f"SELECT data FROM {self._table(file_path)}{where} ORDER BY {order}", params)]
+
+
+storage = SqliteStorage(DATABASE_FILE) if STORAGE_BACKEND == 'sqlite' else JsonStorage()
+
+# --- PARSED DATA CACHE ---
+# load_data hands out the already-parsed records while the files behind a dataset are
+# unchanged. Records are read-only mappings so one caller can't corrupt another's view.
+# Writes this process makes are queued on the cache entry and folded into a new tuple only
+# when someone next asks for the whole dataset, so a write costs the size of the write,
+# not the size of the dataset.
+_data_cache = {}
+data_cache_stats = {'hits': 0, 'misses': 0}
+
+
+class CachedDataset:
+    """The parsed records of one dataset plus the writes queued since they were last
+    materialized. version counts the writes applied, so indexes can tell if they kept up."""
+
+    def __init__(self, signature, records):
+        self.signature = signature
+        self.count = len(records)
+        self.version = 0
+        self._records = records
+        # Removed and replaced records are keyed by id() and kept alive, so no new record
+        # can reuse one of those ids while the write is queued.
+        self._added, self._removed, self._replaced = [], {}, {}
+        self._lock = threading.Lock()
+
+    def apply(self, signature, added=(), removed=(), updated=()):
+        with self._lock:
+            self._added.extend(added)
+            self._removed.update((id(r), r) for r in removed)
+            self._replaced.update((id(old), (old, new)) for old, new in updated)
+            self.count += len(added) - len(removed)
+            self.signature = signature
+            self.version += 1
+
+    def _latest(self, record):
+        while id(record) in self._replaced: record = self._replaced[id(record)][1]
+        return record
+
+    def snapshot(self):
+        """(version, records tuple) with every queued write folded in."""
+        with self._lock:
+            if self._added or self._removed or self._replaced:
+                rows = itertools.chain(self._records, self._added)
+                if self._replaced: rows = map(self._latest, rows)
+                self._records = tuple(r for r in rows if id(r) not in self._removed) if self._removed else tuple(rows)
+                self._added, self._removed, self._replaced = [], {}, {}
+            return self.version, self._records
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def invalidate_data_cache(file_path):
+    _data_cache.pop(file_path, None)
+
+# --- RUNNING AGGREGATES ---
+# Totals per type, per category and per month are updated on every insert and delete and
+# saved to AGGREGATES_FILE with the storage signature of the data they describe. They are
+# only recomputed from the raw records when that signature no longer matches, e.g. after
+# the data files were edited by hand.
+AGGREGATES_FILE = os.path.join(DATA_DIR, 'aggregates.json')
+# Bumped whenever the shape of the saved aggregates changes, forcing one rebuild.
+AGGREGATES_VERSION = 3
+# Seconds a write may wait before the aggregates file is rewritten; writes in between share it.
+AGGREGATES_SAVE_DELAY = 2.0
+# Batches at least this large are summed per (date, type, category) with one pandas
+# groupby before they are folded in, instead of record by record.
+AGGREGATES_GROUPBY_MIN = 1000
+
+def aggregate_fields(record, file_path):
+    """(type, category, date, amount) of a record; investments count as type 'Investment'."""
+    if file_path == INVESTMENTS_FILE:
+        return 'Investment', record.get('type') or 'Other', record['purchase_date'], record['amount_invested']
+    return record['type'], record['category'], record['date'], record['amount']
+
+
+class Aggregates:
+    def __init__(self, path):
+        self.path = path
+        self.state = None
+        self._save_timer = None
+        self._day_sums = None
+        self._lock = threading.RLock()
+
+    def _signatures(self):
+        # Round-tripped through JSON so it compares equal to the persisted copy.
+        return json.loads(json.dumps({file_path: storage.signature(file_path) for file_path in DATASET_FIELDS}))
+
+    @staticmethod
+    def _add(totals, key, amount):
+        total = totals.get(key, 0) + amount
+        # Drop totals that deletes brought back to zero (up to float noise).
+        if abs(total) < 1e-6: totals.pop(key, None)
+        else: totals[key] = total
+
+    def _fold(self, record_type, category, date, amount):
+        state = self.state
+        self._add(state['by_type'], record_type, amount)
+        self._add(state['by_category'].setdefault(record_type, {}), category, amount)
+        self._add(state['by_month'].setdefault(date[:7], {}), record_type, amount)
+        self._add(state['by_month_category'].setdefault(date[:7], {}).setdefault(record_type, {}), category, amount)
+        self._add(state['by_day'].setdefault(date, {}), record_type, amount)
+        self._day_sums = None
+
+    def _apply(self, record, file_path, sign):
+        record_type, category, date, amount = aggregate_fields(record, file_path)
+        self._fold(record_type, category, date, amount * sign)
+        self.state['counts'][file_path] = self.state['counts'].get(file_path, 0) + sign
+
+    def _apply_many(self, records, file_path, sign):
+        if len(records) < AGGREGATES_GROUPBY_MIN:
+            for record in records: self._apply(record, file_path, sign)
+            return
+        frame = pd.DataFrame([aggregate_fields(record, file_path) for record in records], columns=['type', 'category', 'date', 'amount'])
+        sums = frame.groupby(['type', 'category', 'date'], sort=False)['amount'].sum()
+        for (record_type, category, date), amount in zip(sums.index.tolist(), sums.tolist()): self._fold(record_type, category, date, amount * sign)
+        self.state['counts'][file_path] = self.state['counts'].get(file_path, 0) + sign * len(records)
+
+    def _save(self):
+        # Saves the signatures captured when the totals were computed, never fresh ones: a
+        # write from another process in between must leave them mismatched.
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f: f.write(json.dumps(self.state))
+        os.replace(tmp_path, self.path)
+
+    def _schedule_save(self):
+        # Writes only update the in-memory totals; the file is rewritten at most once per
+        # AGGREGATES_SAVE_DELAY. If the process dies first, the saved signatures no longer
+        # match the data and the next start rebuilds, so nothing is lost but time.
+        self.state['signatures'] = self._signatures()
+        if self._save_timer: return
+        self._save_timer = threading.Timer(AGGREGATES_SAVE_DELAY, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self):
+        with self._lock:
+            if not self._save_timer: return
+            self._save_timer.cancel()
+            self._save_timer = None
+            if self.state is not None: self._save()
+
+    def rebuild(self):
+        with self._lock:
+            # Taken before the records are read, so a write that lands meanwhile forces another rebuild.
+            signatures = self._signatures()
+            self.state = {'version': AGGREGATES_VERSION, 'by_type': {}, 'by_category': {}, 'by_month': {}, 'by_month_category': {}, 'by_day': {}, 'counts': {}, 'signatures': signatures}
+            for file_path in DATASET_FIELDS: self._apply_many(load_data(file_path), file_path, 1)
+            self._save()
+            return self.state
+
+    def current(self):
+        """Returns the aggregates, rebuilding them only if they don't match the stored data."""
+        with self._lock:
+            if self.state is None and os.path.exists(self.path):
+                with open(self.path, 'r') as f: self.state = json.load(f)
+            if self.state is None or self.state.get('version') != AGGREGATES_VERSION or self.state.get('signatures') != self._signatures():
+                return self.rebuild()
+            return self.state
+
+    def _running_day_totals(self, state):
+        """Sorted days with activity and, per type, the running total through each of them.
+        Rebuilt on the first range query after a write."""
+        if self._day_sums is None or self._day_sums[0] is not state:
+            by_day = state['by_day']
+            days = sorted(by_day)
+            types = {record_type for day in by_day.values() for record_type in day}
+            sums = {record_type: np.cumsum([by_day[d].get(record_type, 0) for d in days]) for record_type in types}
+            self._day_sums = (state, days, sums)
+        return self._day_sums[1], self._day_sums[2]
+
+    def range_totals(self, start_date=None, end_date=None):
+        """Totals per type for records dated within [start_date, end_date], as the difference of
+        two running totals found by binary search over the days with activity."""
+        with self._lock:
+            state = self.current()
+            if not start_date and not end_date: return dict(state['by_type'])
+            days, sums = self._running_day_totals(state)
+            lo = bisect.bisect_left(days, start_date) if start_date else 0
+            hi = bisect.bisect_right(days, end_date) if end_date else len(days)
+            if lo >= hi: return {}
+            totals = {record_type: float(running[hi - 1] - (running[lo - 1] if lo else 0)) for record_type, running in sums.items()}
+            return {record_type: total for record_type, total in totals.items() if abs(total) >= 1e-6}
+
+    def track(self, write, file_path):
+        """Runs write() against storage and folds the (added, removed) records it returns into
+        the totals. write() looks up what it changes while the lock is held, so two writers
+        can't both remove the same record."""
+        with self._lock:
+            self.current()
+            added, removed = write()
+            self._apply_many(added, file_path, 1)
+            self._apply_many(removed, file_path, -1)
+            self._schedule_save()
+
+    def invalidate(self):
+        with self._lock:
+            if self._save_timer: self._save_timer.cancel()
+            self._save_timer = None
+            self.state = None
+            if os.path.exists(self.path): os.remove(self.path)
+
+
+aggregates = Aggregates(AGGREGATES_FILE)
+atexit.register(aggregates.flush)
 
 # --- HELPER FUNCTIONS ---
 def setup_data_files():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-    if not os.path.exists(TRANSACTIONS_FILE):
-        with open(TRANSACTIONS_FILE, 'w') as f: json.dump([], f)
-    if not os.path.exists(INVESTMENTS_FILE):
-        with open(INVESTMENTS_FILE, 'w') as f: json.dump([], f)
+    storage.setup()
+
+def cached_dataset(file_path):
+    signature = storage.signature(file_path)
+    cached = _data_cache.get(file_path)
+    if cached and cached.signature == signature:
+        data_cache_stats['hits'] += 1
+        return cached
+    data_cache_stats['misses'] += 1
+    cached = CachedDataset(signature, tuple(MappingProxyType(r) for r in storage.load(file_path)))
+    _data_cache[file_path] = cached
+    return cached
 
 def load_data(file_path):
-    with open(file_path, 'r') as f: return json.load(f)
+    return cached_dataset(file_path).snapshot()[1]
+
+def record_count(file_path):
+    return cached_dataset(file_path).count
 
 def save_data(data, file_path):
-    with open(file_path, 'w') as f: json.dump(data, f, indent=4)
+    storage.save(data, file_path)
+    invalidate_data_cache(file_path)
+    aggregates.invalidate()
+
+def update_cached_data(file_path, signature_before, added=(), removed=(), updated=(), copy=True):
+    """Applies a write this process just made to the cached records, date index and id index,
+    so the next read needn't re-parse the files. updated holds (old, new) pairs for records
+    edited in place. Added records are copied unless copy is False. Falls back to invalidating
+    if the cache was stale."""
+    cached = _data_cache.get(file_path)
+    if not cached or cached.signature != signature_before:
+        invalidate_data_cache(file_path)
+        return
+    added = [MappingProxyType(dict(r)) for r in added] if copy else list(map(MappingProxyType, added))
+    updated = [(old, MappingProxyType(dict(new))) for old, new in updated]
+    version = cached.version
+    cached.apply(storage.signature(file_path), added, removed, updated)
+    # An edit leaves the indexes as a removal of the old record plus an addition of the new one.
+    added, removed = added + [new for _, new in updated], list(removed) + [old for old, _ in updated]
+    indexed = _date_indexes.get(file_path)
+    if indexed and indexed[0] is cached and indexed[1] == version:
+        indexed[2].update(added=added, removed=removed)
+        _date_indexes[file_path] = (cached, cached.version, indexed[2])
+    by_id = _id_indexes.get(file_path)
+    if by_id and by_id[0] is cached and by_id[1] == version:
+        for record in removed: by_id[2].pop(record.get('id'), None)
+        by_id[2].update((record['id'], record) for record in added if record.get('id'))
+        _id_indexes[file_path] = (cached, cached.version, by_id[2])
+
+def append_record(record, file_path):
+    append_records([record], file_path)
+
+def append_records(records, file_path, copy=True):
+    """Adds a batch of records with a single storage write. Pass copy=False for records built
+    just for this call that the caller won't touch again; the cache then keeps them as they are."""
+    if not records: return
+    def write():
+        signature_before = storage.signature(file_path)
+        storage.append_many(records, file_path)
+        update_cached_data(file_path, signature_before, added=records, copy=copy)
+        return records, ()
+    aggregates.track(write, file_path)
+    if storage.needs_compaction(file_path, record_count(file_path)): schedule_compaction(file_path)
+
+def delete_record(record_id, file_path):
+    return delete_records([record_id], file_path)
+
+def update_record(record_id, changes, file_path):
+    """Edits a record in place with one journal entry or row update; returns the new record,
+    or None if there is no record with that id."""
+    updated = []
+    def write():
+        old = get_record(record_id, file_path)
+        if old is None: return (), ()
+        new = {**old, **changes, 'id': record_id}
+        signature_before = storage.signature(file_path)
+        storage.update(new, file_path)
+        update_cached_data(file_path, signature_before, updated=[(old, new)])
+        updated.append(new)
+        return [new], [old]
+    aggregates.track(write, file_path)
+    if not updated: return None
+    if storage.needs_compaction(file_path, record_count(file_path)): schedule_compaction(file_path)
+    return updated[0]
+
+def delete_records(record_ids, file_path):
+    """Deletes the records with the given ids in a single storage write; returns how many existed.
+    Ids that are already gone, e.g. deleted by a concurrent request, are skipped."""
+    removed = []
+    def write():
+        by_id = get_id_index(file_path)
+        removed.extend(by_id[record_id] for record_id in set(record_ids) if record_id in by_id)
+        if not removed: return (), ()
+        signature_before = storage.signature(file_path)
+        storage.delete_many([r['id'] for r in removed], file_path)
+        update_cached_data(file_path, signature_before, removed=removed)
+        return (), removed
+    aggregates.track(write, file_path)
+    if not removed: return 0
+    if storage.needs_compaction(file_path, record_count(file_path)): schedule_compaction(file_path)
+    return len(removed)
+
+# --- BACKGROUND COMPACTION ---
+# Folding tombstones back into the snapshot rewrites the whole file, so it runs on its own
+# thread rather than in the request that crossed the threshold. The new snapshot is written
+# from the cached records without any lock held; only swapping it in takes the aggregates
+# and storage locks. The records don't change, so the cached records, date index and
+# aggregates are carried over instead of rebuilt.
+_compacting = set()
+_compacting_lock = threading.Lock()
+
+def cached_records(file_path, signature):
+    """The cached records if they match signature, else None."""
+    cached = _data_cache.get(file_path)
+    return cached.snapshot()[1] if cached and cached.signature == signature else None
+
+def compact_dataset(file_path):
+    plan = storage.begin_compaction(file_path, lambda signature: cached_records(file_path, signature))
+    def write():
+        signature_before = storage.signature(file_path)
+        storage.finish_compaction(plan)
+        update_cached_data(file_path, signature_before)
+        return (), ()
+    aggregates.track(write, file_path)
+
+def schedule_compaction(file_path):
+    with _compacting_lock:
+        if file_path in _compacting: return
+        _compacting.add(file_path)
+    def run():
+        try:
+            compact_dataset(file_path)
+        except Exception as e:
+            print(f"Error compacting {file_path}: {e}")
+        finally:
+            with _compacting_lock: _compacting.discard(file_path)
+    # Not a daemon, so shutdown waits for the snapshot and journal to be swapped.
+    threading.Thread(target=run, name='compaction').start()
+
+def query_data(file_path, record_type=None, start_date=None, end_date=None, newest_first=False):
+    return storage.query(file_path, record_type, start_date, end_date, newest_first)
+
+# --- DATE INDEX ---
+# Each dataset keeps its records sorted by (date, id); ISO date strings already sort in
+# date order. Date ranges and feed pages are found by binary search, so they cost the
+# same however long the history is. Inserts and deletes update the index in place of a
+# re-sort.
+TRANSACTIONS_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Batches bigger than this are merged into the index rather than inserted one by one.
+MERGE_THRESHOLD = 64
+# newest_first copies this many rows at a time out of the index.
+FEED_CHUNK_SIZE = 256
+_date_indexes = {}
+
+
+class DateIndex:
+    """Records of one dataset in ascending (date, id) order, updated in place. Readers copy
+    what they need under the lock, and newest_first resumes from the last key it yielded,
+    so a write landing mid-page doesn't disturb a request paging through the index."""
+
+    def __init__(self, records, date_field):
+        self.date_field = date_field
+        pairs = sorted((self._key(r), r) for r in records)
+        self.keys = [key for key, _ in pairs]
+        self.records = [record for _, record in pairs]
+        self._lock = threading.Lock()
+
+    def _key(self, record):
+        return (record[self.date_field], record.get('id') or '')
+
+    def update(self, added=(), removed=()):
+        with self._lock:
+            for record in removed:
+                key = self._key(record)
+                pos = bisect.bisect_left(self.keys, key)
+                while pos < len(self.keys) and self.keys[pos] == key:
+                    if self.records[pos] is record or self.records[pos].get('id') == record.get('id'):
+                        del self.keys[pos], self.records[pos]
+                        break
+                    pos += 1
+            if len(added) > MERGE_THRESHOLD:
+                # Inserting one at a time is quadratic for a big batch. Sorting the index with the
+                # batch appended is near-linear instead: timsort merges the already-sorted run.
+                keys, records = self.keys + [self._key(r) for r in added], self.records + list(added)
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+                self.keys, self.records = [keys[i] for i in order], [records[i] for i in order]
+                return
+            for record in added:
+                key = self._key(record)
+                pos = bisect.bisect_right(self.keys, key)
+                self.keys.insert(pos, key)
+                self.records.insert(pos, record)
+
+    def _bounds(self, start_date, end_date):
+        lo = bisect.bisect_left(self.keys, (start_date, '')) if start_date else 0
+        hi = bisect.bisect_right(self.keys, (end_date, '\U0010ffff')) if end_date else len(self.keys)
+        return lo, hi
+
+    def between(self, start_date=None, end_date=None):
+        """Records dated within [start_date, end_date], oldest first."""
+        with self._lock:
+            lo, hi = self._bounds(start_date, end_date)
+            return self.records[lo:hi]
+
+    def newest_first(self, before=None, start_date=None, end_date=None):
+        """Yields records newest first whose key sorts below `before`, within the date range."""
+        while True:
+            with self._lock:
+                lo, hi = self._bounds(start_date, end_date)
+                if before: hi = min(hi, bisect.bisect_left(self.keys, before))
+                start = max(lo, hi - FEED_CHUNK_SIZE)
+                keys, records = self.keys[start:hi], self.records[start:hi]
+            yield from zip(reversed(keys), reversed(records))
+            if start <= lo or not keys: return
+            before = keys[0]
+
+
+def get_date_index(file_path):
+    cached = cached_dataset(file_path)
+    indexed = _date_indexes.get(file_path)
+    if indexed and indexed[0] is cached and indexed[1] == cached.version: return indexed[2]
+    version, records = cached.snapshot()
+    index = DateIndex(records, DATASET_FIELDS[file_path]['date'])
+    _date_indexes[file_path] = (cached, version, index)
+    return index
+
+def parse_cursor(cursor):
+    """Cursors are '<date>,<id>' of the last row on the previous page."""
+    if not cursor or ',' not in cursor: return None
+    date, record_id = cursor.split(',', 1)
+    return (date, record_id)
+
+# --- ID INDEX ---
+# {id: record} for each dataset, built on first use from the cached records and kept in
+# step with every write by update_cached_data, so fetches, edits and deletes by id don't
+# scan the dataset.
+_id_indexes = {}
+
+def get_id_index(file_path):
+    cached = cached_dataset(file_path)
+    indexed = _id_indexes.get(file_path)
+    if indexed and indexed[0] is cached and indexed[1] == cached.version: return indexed[2]
+    version, records = cached.snapshot()
+    index = {r['id']: r for r in records if r.get('id')}
+    _id_indexes[file_path] = (cached, version, index)
+    return index
+
+def get_record(record_id, file_path):
+    return get_id_index(file_path).get(record_id)
+
+# --- MARKET DATA PROVIDERS ---
+class QuoteProvider:
+    """Source of market prices. Quotes are keyed by ticker, history by 'YYYY-MM-DD' date.
+    Providers that can't price many tickers in one call set supports_batch to False and
+    implement get_quote; those quotes are then fetched in parallel."""
+
+    supports_batch = True
+
+    def get_quotes(self, tickers):
+        raise NotImplementedError
+
+    def get_quote(self, ticker):
+        return self.get_quotes([ticker]).get(ticker)
+
+    def get_history(self, ticker, start_date, end_date):
+        raise NotImplementedError
+
+
+def close_columns(frame, tickers):
+    """Normalises the 'Close' block of a yf.download result to one column per ticker."""
+    if frame is None or frame.empty: return pd.DataFrame()
+    closes = frame['Close']
+    if isinstance(closes, pd.Series): closes = closes.to_frame(tickers[0])
+    return closes
+
+
+class YahooQuoteProvider(QuoteProvider):
+    def get_quotes(self, tickers):
+        # One multi-symbol download covers every holding instead of a Ticker.info round trip each.
+        tickers = list(tickers)
+        closes = close_columns(yf.download(tickers, period='5d', progress=False), tickers)
+        prices = {}
+        for ticker in closes.columns:
+            series = closes[ticker].dropna()
+            if not series.empty: prices[ticker] = float(series.iloc[-1])
+        return prices
+
+    def get_history(self, ticker, start_date, end_date):
+        closes = close_columns(yf.download(ticker, start=start_date, end=end_date, progress=False), [ticker])
+        if closes.empty: return {}
+        series = closes.iloc[:, 0].dropna()
+        return {index.strftime('%Y-%m-%d'): float(value) for index, value in series.items()}
+
+
+class StaticQuoteProvider(QuoteProvider):
+    """Serves fixed prices after an optional delay, for offline development and tests."""
+
+    def __init__(self, prices, history=None, latency=0.0):
+        self.prices = prices
+        self.history = history or {}
+        self.latency = latency
+
+    def get_quotes(self, tickers):
+        time.sleep(self.latency)
+        return {t: self.prices[t] for t in tickers if t in self.prices}
+
+    def get_history(self, ticker, start_date, end_date):
+        time.sleep(self.latency)
+        return {d: p for d, p in self.history.get(ticker, {}).items() if start_date <= d < end_date}
+
+
+quote_provider = YahooQuoteProvider()
+
+# --- QUOTE CACHE ---
+# Live quotes are reused for QUOTE_TTL_SECONDS while the ticker's market is open. Once it
+# has closed a quote can't change, so it stays valid until that market's next session.
+# The market comes from the Yahoo suffix (.NS/.BO for India, none for US listings); for
+# any other ticker the session isn't known and quotes just expire after the TTL.
+QUOTE_CACHE_SIZE = 512
+QUOTE_TTL_SECONDS = 60
+MARKET_SESSIONS = {
+    'IN': (ZoneInfo('Asia/Kolkata'), dt_time(9, 15), dt_time(15, 30)),
+    'US': (ZoneInfo('America/New_York'), dt_time(9, 30), dt_time(16, 0)),
+}
+SUFFIX_MARKETS = {'.NS': 'IN', '.BO': 'IN'}
+
+def market_for(ticker):
+    """'IN', 'US' or None for tickers whose trading hours aren't known (other exchanges,
+    FX pairs, crypto, indices)."""
+    if '.' in ticker: return SUFFIX_MARKETS.get(ticker[ticker.rindex('.'):].upper())
+    return 'US' if ticker.isalnum() else None
+
+def is_market_open(moment, market='IN'):
+    timezone, market_open, market_close = MARKET_SESSIONS[market]
+    local = moment.astimezone(timezone)
+    return local.weekday() < 5 and market_open <= local.time() < market_close
+
+def next_market_open(moment, market='IN'):
+    timezone, market_open, _ = MARKET_SESSIONS[market]
+    local = moment.astimezone(timezone)
+    candidate = datetime.combine(local.date(), market_open, tzinfo=timezone)
+    if local >= candidate: candidate += timedelta(days=1)
+    while candidate.weekday() >= 5: candidate += timedelta(days=1)
+    return candidate
+
+
+class QuoteCache:
+    """Bounded LRU of (price, fetched_at) quotes with market-aware expiry."""
+
+    def __init__(self, maxsize=QUOTE_CACHE_SIZE, ttl=QUOTE_TTL_SECONDS, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def expires_at(self, now, ticker):
+        market = market_for(ticker)
+        moment = datetime.fromtimestamp(now, ZoneInfo('UTC'))
+        if market is None or is_market_open(moment, market): return now + self.ttl
+        return next_market_open(moment, market).timestamp()
+
+    def get(self, ticker):
+        """Returns (price, fetched_at) for a fresh quote, or None."""
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is None or entry[2] <= self.clock():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(ticker)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def last_known(self, ticker):
+        """Returns (price, fetched_at) even if the quote has expired, or None."""
+        entry = self._entries.get(ticker)
+        return (entry[0], entry[1]) if entry else None
+
+    def put(self, ticker, price):
+        now = self.clock()
+        with self._lock:
+            self._entries[ticker] = (price, now, self.expires_at(now, ticker))
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return price, now
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'hit_rate': round(self.hits / lookups, 3) if lookups else None}
+
+
+quote_cache = QuoteCache()
+
+# --- HISTORICAL PRICE STORE ---
+# Daily closes are kept on disk. The first lookup for a ticker downloads
+# HISTORY_BACKFILL_DAYS before the requested date through today in one request, so
+# later backdated entries and imports for that ticker never leave the machine.
+PRICES_DB_FILE = os.path.join(DATA_DIR, 'prices.db')
+HISTORY_BACKFILL_DAYS = 365
+# A download only counts as covering the dates that came back. Its first and last close may
+# still sit this many days inside the window asked for, to allow for weekends and holidays.
+HISTORY_EDGE_DAYS = 5
+
+def shift_date(date_str, days):
+    return (datetime.strptime(date_str, '%Y-%m-%d') + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+class PriceStore:
+    """Daily closes keyed by (ticker, date) plus the [start, end) range already fetched per ticker.
+    Stored ranges end at today: closes before it are final, while today's bar is still moving
+    and is re-fetched whenever a live quote for the ticker would have expired."""
+
+    def __init__(self, db_path, clock=time.time):
+        self.db_path = db_path
+        self.clock = clock
+        self._ready = False
+        self._today_expires = {}
+
+    def _connect(self):
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            with closing(sqlite3.connect(self.db_path)) as conn, conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS daily_closes (ticker TEXT, date TEXT, close REAL, PRIMARY KEY (ticker, date)) WITHOUT ROWID")
+                conn.execute("CREATE TABLE IF NOT EXISTS fetched_ranges (ticker TEXT PRIMARY KEY, start TEXT, end TEXT)")
+            self._ready = True
+        return closing(sqlite3.connect(self.db_path))
+
+    def covered(self, ticker):
+        with self._connect() as conn:
+            return conn.execute("SELECT start, end FROM fetched_ranges WHERE ticker = ?", (ticker,)).fetchone()
+
+    def closes(self, ticker, start_date, end_date):
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT date, close FROM daily_closes WHERE ticker = ? AND date >= ? AND date < ? ORDER BY date", (ticker, start_date, end_date)))
+
+    def closes_frame(self, tickers, start_date):
+        """Stored closes from start_date on, as a dates x tickers DataFrame."""
+        if not tickers: return pd.DataFrame()
+        placeholders = ', '.join('?' * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT date, ticker, close FROM daily_closes WHERE ticker IN ({placeholders}) AND date >= ?", (*tickers, start_date)).fetchall()
+        if not rows: return pd.DataFrame(columns=list(tickers), dtype=float)
+        frame = pd.DataFrame(rows, columns=['date', 'ticker', 'close']).pivot(index='date', columns='ticker', values='close')
+        frame.index = pd.to_datetime(frame.index)
+        return frame
+
+    def ensure_range(self, ticker, start_date, end_date):
+        """Downloads whatever part of [start_date, end_date) isn't stored yet for ticker."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        tomorrow = shift_date(today, 1)
+        wants_today = end_date > today
+        end_date = min(end_date, today)
+        covered = self.covered(ticker)
+        # Ranges stored before today's bar was kept open-ended may run past today.
+        if covered: covered = (covered[0], min(covered[1], today))
+        if start_date < end_date and not (covered and covered[0] <= start_date and end_date <= covered[1]):
+            if covered and end_date <= covered[1]:
+                fetch_start, fetch_end = shift_date(start_date, -HISTORY_BACKFILL_DAYS), covered[0]
+            elif covered and covered[0] <= start_date:
+                fetch_start, fetch_end = covered[1], today
+            else:
+                fetch_start, fetch_end = shift_date(start_date, -HISTORY_BACKFILL_DAYS), today
+                if covered: fetch_start = min(fetch_start, covered[0])
+            # A download that reaches today picks up today's bar in the same call.
+            with_today = wants_today and fetch_end == today
+            closes = quote_provider.get_history(ticker, fetch_start, tomorrow if with_today else fetch_end)
+            self._store(ticker, closes, self._fetched_range(closes, fetch_start, fetch_end, covered))
+            if with_today: self._today_expires[ticker] = (today, quote_cache.expires_at(self.clock(), ticker))
+        if wants_today and self._today_expires.get(ticker, ('', 0)) < (today, self.clock()):
+            self._store(ticker, quote_provider.get_history(ticker, today, tomorrow))
+            self._today_expires[ticker] = (today, quote_cache.expires_at(self.clock(), ticker))
+
+    @staticmethod
+    def _fetched_range(closes, fetch_start, fetch_end, covered):
+        """The range to record after downloading [fetch_start, fetch_end), or None when nothing
+        came back: yfinance reports a failed download as an empty result, not an error."""
+        if not closes: return None
+        dates = sorted(closes)
+        start = fetch_start if dates[0] <= shift_date(fetch_start, HISTORY_EDGE_DAYS) else dates[0]
+        end = fetch_end if dates[-1] >= shift_date(fetch_end, -HISTORY_EDGE_DAYS) else min(shift_date(dates[-1], 1), fetch_end)
+        if covered and start <= covered[1] and covered[0] <= end: return (min(start, covered[0]), max(end, covered[1]))
+        return (start, end)
+
+    def _store(self, ticker, closes, fetched_range=None):
+        with self._connect() as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO daily_closes (ticker, date, close) VALUES (?, ?, ?)", [(ticker, d, p) for d, p in closes.items()])
+            if fetched_range: conn.execute("INSERT OR REPLACE INTO fetched_ranges (ticker, start, end) VALUES (?, ?, ?)", (ticker, *fetched_range))
+
+
+price_store = PriceStore(PRICES_DB_FILE)
+
+# --- REQUEST COALESCING ---
+_NOT_FETCHED = object()
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _NOT_FETCHED
+        self.error = None
+
+
+class SingleFlight:
+    """Lets one caller fetch a key while concurrent callers for the same key wait and share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.leader_calls = 0
+        self.shared_keys = 0
+
+    def do(self, key, fn):
+        """Returns (fn() result, shared); shared is True when another caller's call was reused."""
+        with self._lock:
+            flight = self._flights.get(key)
+            shared = flight is not None
+            if not shared: flight = self._flights[key] = _Flight()
+        if shared:
+            flight.done.wait()
+            self.shared_keys += 1
+            if flight.error: raise flight.error
+            return flight.value, True
+        self.leader_calls += 1
+        try:
+            flight.value = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock: del self._flights[key]
+            flight.done.set()
+        return flight.value, False
+
+    def do_many(self, keys, fn):
+        """Calls fn(keys) -> {key: value} once for the keys nobody else is fetching and waits
+        for the rest. Keys that no call returned a value for are left out of the result."""
+        owned, awaited = [], []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                flight = self._flights.get(key)
+                if flight is None:
+                    owned.append((key, self._flights.setdefault(key, _Flight())))
+                else:
+                    awaited.append((key, flight))
+        results = {}
+        if owned:
+            self.leader_calls += 1
+            values, error = {}, None
+            try:
+                values = fn([key for key, _ in owned])
+            except Exception as e:
+                error = e
+            with self._lock:
+                for key, flight in owned:
+                    flight.value, flight.error = values.get(key, _NOT_FETCHED), error
+                    del self._flights[key]
+                    flight.done.set()
+            if error: raise error
+            results.update({key: values[key] for key, _ in owned if key in values})
+        for key, flight in awaited:
+            flight.done.wait()
+            self.shared_keys += 1
+            if flight.error: raise flight.error
+            if flight.value is not _NOT_FETCHED: results[key] = flight.value
+        return results
+
+    def stats(self):
+        return {'in_flight': len(self._flights), 'leader_calls': self.leader_calls, 'shared_keys': self.shared_keys}
+
+
+quote_flight = SingleFlight()
+history_flight = SingleFlight()
+
+def is_cash_ticker(ticker):
+    return not ticker or ticker.lower() == 'n/a'
+
+def stored_closes(ticker, start_date, end_date):
+    """Daily closes for ticker in [start_date, end_date), downloading whatever isn't stored yet."""
+    _, shared = history_flight.do(ticker, lambda: price_store.ensure_range(ticker, start_date, end_date))
+    # Another caller's download may have covered a different window; this re-check is local
+    # unless it didn't.
+    if shared: price_store.ensure_range(ticker, start_date, end_date)
+    return price_store.closes(ticker, start_date, end_date)
+
+def close_on(closes, dates, date_str):
+    """The close on date_str, else the next one within two days, else the last one in the four
+    days before it, so a weekend or holiday still finds a price. dates is sorted(closes)."""
+    pos = bisect.bisect_left(dates, date_str)
+    if pos < len(dates) and dates[pos] < shift_date(date_str, 2): return closes[dates[pos]]
+    if pos and dates[pos - 1] >= shift_date(date_str, -4): return closes[dates[pos - 1]]
+    return None
 
 def get_historical_price(ticker, date_str):
-    if not ticker or ticker.lower() == 'n/a': return 1.0
+    if is_cash_ticker(ticker): return 1.0
     try:
-        start_date = datetime.strptime(date_str, '%Y-%m-%d')
-        end_date = start_date + timedelta(days=2)
-        stock_history = yf.download(ticker, start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'), progress=False)
-        if stock_history.empty:
-            prev_day_start = start_date - timedelta(days=4)
-            stock_history = yf.download(ticker, start=prev_day_start.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'), progress=False)
-            if stock_history.empty: return None
-            return float(stock_history['Close'].iloc[-1])
-        return float(stock_history['Close'].iloc[0])
+        closes = stored_closes(ticker, shift_date(date_str, -4), shift_date(date_str, 2))
+        return close_on(closes, sorted(closes), date_str)
     except Exception as e:
         print(f"Error fetching historical price for {ticker}: {e}")
         return None
 
-def get_live_price(ticker):
-    if not ticker or ticker.lower() == 'n/a': return 1.0
+def get_historical_prices(pairs):
+    """Prices for many (ticker, date) pairs, with one range lookup per ticker covering all of
+    its dates. Pairs without a price are left out."""
+    dates_by_ticker = {}
+    for ticker, date_str in pairs: dates_by_ticker.setdefault(ticker, set()).add(date_str)
+    prices = {}
+    for ticker, dates in dates_by_ticker.items():
+        if is_cash_ticker(ticker):
+            prices.update({(ticker, d): 1.0 for d in dates})
+            continue
+        try:
+            closes = stored_closes(ticker, shift_date(min(dates), -4), shift_date(max(dates), 2))
+        except Exception as e:
+            print(f"Error fetching historical prices for {ticker}: {e}")
+            continue
+        ordered = sorted(closes)
+        for date_str in dates:
+            price = close_on(closes, ordered, date_str)
+            if price is not None: prices[(ticker, date_str)] = price
+    return prices
+
+# --- CONCURRENT QUOTE FETCHING ---
+# Upstream quote calls run on a bounded pool. A page waits at most QUOTE_FETCH_DEADLINE
+# seconds; holdings still unpriced by then show their last known price, flagged stale.
+QUOTE_FETCH_WORKERS = int(os.environ.get('FINTRACK_QUOTE_WORKERS', 8))
+QUOTE_FETCH_DEADLINE = float(os.environ.get('FINTRACK_QUOTE_DEADLINE', 5))
+quote_executor = ThreadPoolExecutor(max_workers=QUOTE_FETCH_WORKERS, thread_name_prefix='quote-fetch')
+
+def cache_late_quotes(future, ticker=None):
+    """Keeps the result of a fetch that finished after its deadline for the next request."""
     try:
-        stock = yf.Ticker(ticker)
-        price = stock.info.get('previousClose', stock.info.get('regularMarketPrice'))
-        return float(price) if price else 0.0
+        result = future.result()
     except Exception as e:
-        print(f"Error fetching live price for {ticker}: {e}")
-        return 0.0
+        print(f"Error fetching live price for {ticker or 'batch'}: {e}")
+        return
+    prices = result if ticker is None else ({ticker: result} if result is not None else {})
+    for t, price in prices.items(): quote_cache.put(t, price)
 
-def enrich_investments_data(investments):
-    enriched = []
+def fetch_quotes(tickers, deadline=None):
+    """Fetches quotes on the pool and returns whatever arrived before the deadline."""
+    deadline = QUOTE_FETCH_DEADLINE if deadline is None else deadline
+    if quote_provider.supports_batch:
+        futures = {quote_executor.submit(quote_provider.get_quotes, tickers): None}
+    else:
+        futures = {quote_executor.submit(quote_provider.get_quote, t): t for t in tickers}
+    done, pending = wait(futures, timeout=deadline)
+    prices = {}
+    for future in done:
+        ticker = futures[future]
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error fetching live price for {ticker or ', '.join(tickers)}: {e}")
+            continue
+        if ticker is None: prices.update(result)
+        elif result is not None: prices[ticker] = result
+    for future in pending:
+        future.add_done_callback(lambda f, ticker=futures[future]: cache_late_quotes(f, ticker))
+    return prices
+
+def get_live_quotes(tickers, force=False):
+    """Returns {ticker: (price, as_of timestamp, stale)}, fetching only tickers missing from the quote cache,
+    or with force every ticker, in one batched call. A ticker with neither a fresh nor a last known price is left out."""
+    now = time.time()
+    quotes = {t: (1.0, now, False) for t in tickers if is_cash_ticker(t)}
+    wanted = []
+    for ticker in sorted({t for t in tickers if not is_cash_ticker(t)}):
+        cached = None if force else quote_cache.get(ticker)
+        if cached: quotes[ticker] = cached + (False,)
+        else: wanted.append(ticker)
+    if wanted:
+        try:
+            fetched = quote_flight.do_many(wanted, fetch_quotes)
+        except Exception as e:
+            print(f"Error fetching live prices for {', '.join(wanted)}: {e}")
+            fetched = {}
+        for ticker in wanted:
+            if ticker in fetched:
+                quotes[ticker] = quote_cache.put(ticker, fetched[ticker]) + (False,)
+            elif quote_cache.last_known(ticker):
+                quotes[ticker] = quote_cache.last_known(ticker) + (True,)
+    return quotes
+
+def get_cached_quotes(tickers):
+    """Same shape as get_live_quotes, but answered from the refresher snapshot and the quote cache
+    alone; a ticker neither has seen is left out. Never waits on the network."""
+    now = time.time()
+    quotes = quote_refresher.quotes(tickers) if quote_refresher.running else {t: (1.0, now, False) for t in tickers if is_cash_ticker(t)}
+    for ticker in {t for t in tickers if t not in quotes}:
+        cached = quote_cache.get(ticker)
+        if cached: quotes[ticker] = cached + (False,)
+        elif quote_cache.last_known(ticker): quotes[ticker] = quote_cache.last_known(ticker) + (True,)
+    return quotes
+
+# --- BACKGROUND QUOTE REFRESHER ---
+# A background thread refreshes quotes for every held ticker each QUOTE_REFRESH_INTERVAL
+# seconds and publishes them as one snapshot. While it runs, page handlers price holdings
+# from that snapshot and never wait on the network. Set the interval to 0 to disable it.
+QUOTE_REFRESH_INTERVAL = int(os.environ.get('FINTRACK_QUOTE_REFRESH', 300))
+
+
+class QuoteRefresher:
+    """Keeps a read-only {ticker: (price, as_of)} snapshot of quotes for all held tickers."""
+
+    def __init__(self, interval=QUOTE_REFRESH_INTERVAL, provider=None, clock=time.time):
+        self.interval = interval
+        self.provider = provider
+        self.clock = clock
+        self.snapshot = MappingProxyType({})
+        self.refresh_count = 0
+        self.last_refresh = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def held_tickers(self):
+        return sorted({inv['ticker'] for inv in load_data(INVESTMENTS_FILE) if not is_cash_ticker(inv['ticker'])})
+
+    def refresh(self):
+        """Fetches every held ticker once; returns False when nothing is held."""
+        tickers = self.held_tickers()
+        if not tickers:
+            self.snapshot = MappingProxyType({})
+            return False
+        prices = quote_flight.do_many(tickers, (self.provider or quote_provider).get_quotes)
+        now = self.clock()
+        # Keep the previous quote for a ticker the provider skipped this round.
+        snapshot = {t: (prices[t], now) if t in prices else self.snapshot[t] for t in tickers if t in prices or t in self.snapshot}
+        for ticker, price in prices.items(): quote_cache.put(ticker, price)
+        self.snapshot = MappingProxyType(snapshot)
+        self.refresh_count += 1
+        self.last_refresh = now
+        return True
+
+    def quotes(self, tickers):
+        """Reads quotes from the snapshot only; asks for an early refresh if a ticker is missing."""
+        now = self.clock()
+        snapshot = self.snapshot
+        quotes = {t: (1.0, now, False) for t in tickers if is_cash_ticker(t)}
+        # A quote the refresher has failed to update for two rounds is flagged stale.
+        quotes.update({t: snapshot[t] + (now - snapshot[t][1] > 2 * self.interval,) for t in tickers if t in snapshot})
+        if any(t not in quotes for t in tickers): self._wake.set()
+        return quotes
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing quotes: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if self.running: return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='quote-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread: self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        return {'running': self.running, 'interval': self.interval, 'tickers': len(self.snapshot), 'refresh_count': self.refresh_count, 'last_refresh': self.last_refresh}
+
+
+quote_refresher = QuoteRefresher()
+atexit.register(quote_refresher.stop)
+
+ENRICHED_COLUMNS = ['current_price', 'current_value', 'gain_loss', 'holding_months', 'tax_status', 'price_as_of', 'price_stale']
+
+def iter_enriched_investments(investments, quotes=None):
+    """Prices every holding up front, then yields the enriched rows one at a time.
+    quotes, if given, is a {ticker: (price, as_of, stale)} map to price from instead."""
+    tickers = [inv['ticker'] for inv in investments]
+    if quotes is None: quotes = quote_refresher.quotes(tickers) if quote_refresher.running else get_live_quotes(tickers)
     for inv in investments:
-        current_price = get_live_price(inv['ticker'])
+        # A holding nobody has priced yet is shown at its purchase price rather than zero.
+        current_price, price_as_of, price_stale = quotes.get(inv['ticker'], (inv.get('purchase_price', 0.0), None, True))
         units = float(inv.get('units', 0))
         current_value = units * current_price if current_price else 0
         gain_loss = current_value - inv['amount_invested']
@@ -79,77 +1348,459 @@ def enrich_investments_data(investments):
         if inv['type'] in ['Stock', 'ETF', 'Mutual Fund']:
             tax_status = "LTCG" if holding_months > 12 else "STCG"
         inv_copy = inv.copy()
-        inv_copy.update({'current_price': round(current_price, 2), 'current_value': round(current_value, 2), 'gain_loss': round(gain_loss, 2), 'holding_months': holding_months, 'tax_status': tax_status})
-        enriched.append(inv_copy)
-    return enriched
+        inv_copy.update({'current_price': round(current_price, 2), 'current_value': round(current_value, 2), 'gain_loss': round(gain_loss, 2), 'holding_months': holding_months, 'tax_status': tax_status, 'price_as_of': datetime.fromtimestamp(price_as_of).strftime('%Y-%m-%d %H:%M:%S') if price_as_of else None, 'price_stale': price_stale})
+        yield inv_copy
+
+def enrich_investments_data(investments):
+    return list(iter_enriched_investments(investments))
+
+# --- LOCAL SYMBOL INDEX ---
+# Ticker search is answered from symbol master CSVs in SYMBOLS_DIR (any file with a
+# symbol/ticker column and a name column, e.g. NSE's EQUITY_L.csv or NASDAQ listings).
+# Symbols from files named nse*.csv / bse*.csv get the Yahoo .NS / .BO suffix. Yahoo is
+# only asked when the index has no match, and its answers are kept in learned.csv.
+SYMBOLS_DIR = os.path.join(DATA_DIR, 'symbols')
+LEARNED_SYMBOLS_FILE = os.path.join(SYMBOLS_DIR, 'learned.csv')
+SYMBOL_COLUMNS = ('symbol', 'ticker')
+NAME_COLUMNS = ('name', 'name of company', 'security name', 'company name', 'longname')
+EXCHANGE_SUFFIXES = {'nse': '.NS', 'bse': '.BO'}
+SEARCH_RESULT_LIMIT = 10
+
+
+def search_tokens(text):
+    return [token for token in re.split(r'[^0-9a-z]+', text.lower()) if token]
+
+
+class SymbolIndex:
+    """Prefix trie over ticker and company-name words with one-typo fuzzy fallback."""
+
+    # Caps how many tickers a short, common prefix collects before ranking.
+    MAX_CANDIDATES = 200
+
+    def __init__(self):
+        self.root = {}
+        self.names = {}
+        self.words = {}
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def add(self, ticker, name):
+        if not ticker or ticker in self.names: return
+        words = set(search_tokens(name)) | {ticker.lower(), ticker.split('.')[0].lower()}
+        self.names[ticker] = name
+        self.words[ticker] = words
+        for word in words:
+            node = self.root
+            for char in word: node = node.setdefault(char, {})
+            node.setdefault('$', []).append(ticker)
+
+    def load(self, directory=SYMBOLS_DIR):
+        with self._lock:
+            if self.loaded: return
+            for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+                suffix = next((s for prefix, s in EXCHANGE_SUFFIXES.items() if os.path.basename(path).lower().startswith(prefix)), '')
+                with open(path, newline='', encoding='utf-8-sig') as f:
+                    reader = csv.DictReader(f)
+                    columns = {c.strip().lower(): c for c in reader.fieldnames or []}
+                    symbol_col = next((columns[c] for c in SYMBOL_COLUMNS if c in columns), None)
+                    name_col = next((columns[c] for c in NAME_COLUMNS if c in columns), None)
+                    if not symbol_col or not name_col:
+                        print(f"Skipping symbol file {path}: no symbol/name columns")
+                        continue
+                    for row in reader:
+                        symbol = row[symbol_col].strip().upper()
+                        if suffix and '.' not in symbol: symbol += suffix
+                        self.add(symbol, row[name_col].strip())
+            self.loaded = True
+
+    def _collect(self, node, found):
+        # Breadth-first, so the shortest (closest) completions are collected first.
+        queue = deque([node])
+        while queue and len(found) < self.MAX_CANDIDATES:
+            node = queue.popleft()
+            for key, child in node.items():
+                if key == '$': found.update(child[:self.MAX_CANDIDATES - len(found)])
+                else: queue.append(child)
+
+    def _prefix(self, word):
+        node = self.root
+        for char in word:
+            node = node.get(char)
+            if node is None: return set()
+        found = set()
+        self._collect(node, found)
+        return found
+
+    @staticmethod
+    def _edit_row(word, char, previous, previous_char=None, before_previous=None):
+        """Next row of the edit-distance table after the trie path is extended by `char`."""
+        row = [previous[0] + 1]
+        for i in range(1, len(word) + 1):
+            cost = min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (word[i - 1] != char))
+            if before_previous and i > 1 and word[i - 1] == previous_char and word[i - 2] == char:
+                cost = min(cost, before_previous[i - 2] + 1)
+            row.append(cost)
+        return row
+
+    def _fuzzy_prefix(self, word):
+        """Tickers with a word that starts within one typo (edit or swap) of `word`.
+        The first letter is taken as typed, which keeps the walk to one subtree."""
+        found = set()
+        start = self.root.get(word[0])
+        if start is None: return found
+        first_row = list(range(len(word) + 1))
+        start_row = self._edit_row(word, word[0], first_row)
+        stack = [(child, char, start_row, word[0], first_row) for char, child in start.items() if char != '$']
+        while stack and len(found) < self.MAX_CANDIDATES:
+            node, char, previous, previous_char, before_previous = stack.pop()
+            row = self._edit_row(word, char, previous, previous_char, before_previous)
+            if row[-1] <= 1: self._collect(node, found)
+            elif min(row) <= 1: stack.extend((child, c, row, char, previous) for c, child in node.items() if c != '$')
+        return found
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        if not self.loaded: self.load()
+        words = search_tokens(query)
+        if not words: return []
+        symbol = query.strip().lower()
+        with self._lock:
+            # A ticker typed with its suffix or punctuation ("tcs.ns", "m&m") is matched whole
+            # against the full tickers before it is split into words.
+            candidates = self._prefix(symbol) if symbol not in words and not any(c.isspace() for c in symbol) else set()
+            if candidates:
+                def rank(ticker):
+                    return (ticker.lower() != symbol, len(self.names[ticker]), ticker)
+            else:
+                # The longest word picks the candidates; the others only have to prefix one of their words.
+                anchor = max(words, key=len)
+                candidates = self._prefix(anchor)
+                if not candidates and len(anchor) >= 4: candidates = self._fuzzy_prefix(anchor)
+                others = [w for w in words if w is not anchor]
+                candidates = [t for t in candidates if all(any(word.startswith(w) for word in self.words[t]) for w in others)]
+                compact = ''.join(words)
+                def rank(ticker):
+                    base = ticker.split('.')[0].lower()
+                    return (base != compact, not base.startswith(compact), len(self.names[ticker]), ticker)
+            return [{'name': self.names[t], 'ticker': t} for t in sorted(candidates, key=rank)[:limit]]
+
+    def learn(self, results):
+        """Adds Yahoo results to the index and to learned.csv."""
+        new = [r for r in results if r['ticker'] not in self.names]
+        if not new: return
+        with self._lock:
+            for r in new: self.add(r['ticker'], r['name'])
+            os.makedirs(SYMBOLS_DIR, exist_ok=True)
+            is_new_file = not os.path.exists(LEARNED_SYMBOLS_FILE)
+            with open(LEARNED_SYMBOLS_FILE, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if is_new_file: writer.writerow(['symbol', 'name'])
+                writer.writerows([r['ticker'], r['name']] for r in new)
+
+
+symbol_index = SymbolIndex()
+
+# --- HTTP CLIENT ---
+# One pooled keep-alive session for outbound calls, so repeat searches skip the DNS, TCP
+# and TLS setup, and a hung upstream can't hold a worker past the timeouts.
+HTTP_CONNECT_TIMEOUT = 3.05
+HTTP_READ_TIMEOUT = 10
+HTTP_POOL_SIZE = 10
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 3600
+
+http_adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+http_session = requests.Session()
+http_session.headers.update({'User-Agent': 'Mozilla/5.0'})
+http_session.mount('https://', http_adapter)
+http_session.mount('http://', http_adapter)
+
+def http_pool_stats():
+    pools = http_adapter.poolmanager.pools
+    connection_pools = [pools[key] for key in pools.keys()]
+    return {'pools': len(connection_pools), 'maxsize': HTTP_POOL_SIZE, 'connections_opened': sum(p.num_connections for p in connection_pools), 'requests': sum(p.num_requests for p in connection_pools), 'idle_connections': sum(p.pool.qsize() for p in connection_pools if p.pool)}
+
+
+class SearchCache:
+    """Bounded TTL cache of normalised search query -> Yahoo results. A query that extends
+    a cached one is answered by filtering the shorter query's results when any still match."""
+
+    def __init__(self, maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.prefix_hits = self.misses = 0
+
+    def get(self, query):
+        now = self.clock()
+        with self._lock:
+            for length in range(len(query), 1, -1):
+                entry = self._entries.get(query[:length])
+                if entry is None or entry[1] <= now: continue
+                results = entry[0]
+                if length < len(query):
+                    words = search_tokens(query)
+                    results = [r for r in results if all(any(token.startswith(w) for token in search_tokens(r['name'] + ' ' + r['ticker'])) for w in words)]
+                    if not results: continue
+                    self.prefix_hits += 1
+                else:
+                    self.hits += 1
+                self._entries.move_to_end(query[:length])
+                return results
+            self.misses += 1
+            return None
+
+    def put(self, query, results):
+        with self._lock:
+            self._entries[query] = (results, self.clock() + self.ttl)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.maxsize: self._entries.popitem(last=False)
+
+    def stats(self):
+        return {'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl, 'hits': self.hits, 'prefix_hits': self.prefix_hits, 'misses': self.misses}
+
+
+search_cache = SearchCache()
 
 # --- API ROUTE FOR TICKER SEARCH ---
 @app.route('/api/search')
 def search_ticker():
     query = request.args.get('q', '')
     if not query or len(query) < 2: return jsonify([])
-    search_url = f"https://query1.finance.yahoo.com/v1/finance/search?q={query}"
-    headers = {'User-Agent': 'Mozilla/5.0'}
+    local_results = symbol_index.search(query)
+    if local_results: return jsonify(local_results)
+    normalized = ' '.join(search_tokens(query))
+    cached = search_cache.get(normalized)
+    if cached is not None: return jsonify(cached)
+    search_url = "https://query1.finance.yahoo.com/v1/finance/search"
     try:
-        response = requests.get(search_url, headers=headers)
+        response = http_session.get(search_url, params={'q': query}, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
         response.raise_for_status()
         data = response.json()
         results = [{'name': item.get('longname', item.get('shortname', '')), 'ticker': item['symbol']} for item in data.get('quotes', []) if item.get('longname') and item.get('symbol')]
+        search_cache.put(normalized, results)
+        symbol_index.learn(results)
         return jsonify(results)
     except requests.exceptions.RequestException as e:
         print(f"API request failed: {e}")
         return jsonify({"error": "Failed to fetch search results"}), 500
 
+# --- TREND API ---
+TREND_SERIES = {'income': 'Income', 'expense': 'Expense', 'invested': 'Investment'}
+ROLLING_WINDOW_MONTHS = 12
+
+def month_range(first_month, last_month):
+    year, month = int(first_month[:4]), int(first_month[5:7])
+    while f"{year:04d}-{month:02d}" <= last_month:
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+@app.route('/api/trends')
+def trends_api():
+    """Monthly income/expense/invested totals with month-over-month change and rolling
+    averages, read from the monthly rollup rather than the raw records."""
+    totals = aggregates.current()
+    by_month = totals['by_month']
+    if not by_month: return jsonify({'months': [], 'series': {}, 'categories': {}})
+    months = list(month_range(min(by_month), max(max(by_month), datetime.now().strftime('%Y-%m'))))
+    shown = request.args.get('months', 24, type=int)
+    start = max(len(months) - shown, 0)
+    series = {}
+    for name, record_type in TREND_SERIES.items():
+        values = [abs(by_month.get(month, {}).get(record_type, 0)) for month in months]
+        running, rolling = 0, []
+        for i, value in enumerate(values):
+            running += value - (values[i - ROLLING_WINDOW_MONTHS] if i >= ROLLING_WINDOW_MONTHS else 0)
+            rolling.append(round(running / min(i + 1, ROLLING_WINDOW_MONTHS), 2))
+        mom = [None] + [round((values[i] - values[i - 1]) / values[i - 1] * 100, 2) if values[i - 1] else None for i in range(1, len(values))]
+        series[name] = {'totals': [round(v, 2) for v in values[start:]], 'mom_change_pct': mom[start:], 'rolling_avg': rolling[start:]}
+    categories = {}
+    for name, record_type in TREND_SERIES.items():
+        names = sorted({c for month in months[start:] for c in totals['by_month_category'].get(month, {}).get(record_type, {})})
+        categories[name] = {c: [round(abs(totals['by_month_category'].get(month, {}).get(record_type, {}).get(c, 0)), 2) for month in months[start:]] for c in names}
+    return jsonify({'months': months[start:], 'series': series, 'categories': categories, 'rolling_window': ROLLING_WINDOW_MONTHS})
+
+# --- NET WORTH HISTORY ---
+def net_worth_history():
+    """Daily cash balance, holdings value and net worth from the first record to today.
+    Holdings are valued from the local price store only (see 'flask warm-price-cache'):
+    a dates x tickers price matrix times the matching units matrix, summed per row."""
+    transactions = pd.DataFrame(list(load_data(TRANSACTIONS_FILE)), columns=['date', 'type', 'amount'])
+    investments = pd.DataFrame(list(load_data(INVESTMENTS_FILE)), columns=['purchase_date', 'ticker', 'units', 'amount_invested', 'purchase_price'])
+    if transactions.empty and investments.empty: return pd.DataFrame(columns=['cash', 'holdings', 'net_worth'])
+    transactions['date'] = pd.to_datetime(transactions['date'])
+    investments['purchase_date'] = pd.to_datetime(investments['purchase_date'])
+    first_day = min(transactions['date'].min() if not transactions.empty else pd.Timestamp.max, investments['purchase_date'].min() if not investments.empty else pd.Timestamp.max)
+    dates = pd.date_range(first_day, max(pd.Timestamp(datetime.now().date()), first_day), freq='D')
+
+    signed = transactions['amount'].where(transactions['type'] == 'Income', -transactions['amount'])
+    cash_flow = signed.groupby(transactions['date']).sum().reindex(dates, fill_value=0.0)
+    cash_flow = cash_flow.sub(investments.groupby('purchase_date')['amount_invested'].sum().reindex(dates, fill_value=0.0), fill_value=0.0)
+    cash = cash_flow.cumsum()
+
+    holdings = pd.Series(0.0, index=dates)
+    if not investments.empty:
+        investments['ticker'] = investments['ticker'].fillna('N/A')
+        units = investments.pivot_table(index='purchase_date', columns='ticker', values='units', aggfunc='sum').reindex(dates, fill_value=0.0).fillna(0.0).cumsum()
+        tickers = [t for t in units.columns if not is_cash_ticker(t)]
+        prices = price_store.closes_frame(tickers, dates[0].strftime('%Y-%m-%d')).reindex(index=dates, columns=units.columns)
+        prices = prices.ffill().bfill()
+        # Tickers with no stored history are valued at their average purchase price.
+        fallback = investments.groupby('ticker')['purchase_price'].mean()
+        prices = prices.fillna(fallback.reindex(units.columns))
+        prices[[t for t in units.columns if is_cash_ticker(t)]] = 1.0
+        holdings = pd.Series(np.einsum('ij,ij->i', units.to_numpy(), prices.fillna(0.0).to_numpy()), index=dates)
+    return pd.DataFrame({'cash': cash, 'holdings': holdings, 'net_worth': cash + holdings})
+
+@app.route('/api/networth')
+def networth_api():
+    history = net_worth_history()
+    return jsonify({'dates': [d.strftime('%Y-%m-%d') for d in history.index], **{column: history[column].round(2).tolist() for column in history.columns}})
+
+# --- DIAGNOSTICS ---
+@app.route('/api/diagnostics')
+def diagnostics():
+    lookups = data_cache_stats['hits'] + data_cache_stats['misses']
+    return jsonify({
+        'data_cache': dict(data_cache_stats, hit_rate=round(data_cache_stats['hits'] / lookups, 3) if lookups else None, entries=len(_data_cache)),
+        'quote_cache': quote_cache.stats(),
+        'quote_refresher': quote_refresher.stats(),
+        'quote_flight': quote_flight.stats(),
+        'history_flight': history_flight.stats(),
+        'http_pool': http_pool_stats(),
+        'search_cache': search_cache.stats(),
+    })
+
+# --- STREAMED RENDERING ---
+# Table pages with more than STREAM_ROWS_THRESHOLD rows are rendered with stream_template,
+# so the header and first rows reach the browser while the rest of the table is still
+# being built. ?stream=1 / ?stream=0 force either mode.
+STREAM_ROWS_THRESHOLD = 1000
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def buffer_chunks(chunks, size=STREAM_CHUNK_SIZE):
+    """Joins Jinja's many small template fragments into fewer, larger writes."""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer: yield ''.join(buffer)
+
+def render_table_page(template_name, row_count, **context):
+    stream = request.args.get('stream', type=int)
+    if stream is None: stream = row_count > STREAM_ROWS_THRESHOLD
+    if stream:
+        # A streamed body is rendered after the session cookie has gone out, so pending flash
+        # messages are taken out of the session now; the template reads them from the request.
+        get_flashed_messages(with_categories=True)
+        return app.response_class(buffer_chunks(stream_template(template_name, **context)), mimetype='text/html')
+    return render_template(template_name, **context)
+
+# --- STATEMENT IMPORT ---
+# Bank-statement CSVs are parsed column-wise with pandas and added in one storage write.
+# STATEMENT_COLUMNS names the CSV headers to read; a statement has either one signed
+# amount column (credits positive) or separate debit and credit columns. Leaving a required
+# column blank keeps its default; leaving description or category blank means there is none.
+STATEMENT_COLUMNS = {'date': 'Date', 'description': 'Description', 'amount': 'Amount', 'debit': None, 'credit': None, 'category': None}
+DEFAULT_IMPORT_CATEGORY = {'Income': 'Other Income', 'Expense': 'Other Expense'}
+
+def bulk_uuid4(count):
+    """count random UUID strings made from a single urandom call."""
+    raw = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+    raw[:, 6] = raw[:, 6] & 0x0F | 0x40  # version 4
+    raw[:, 8] = raw[:, 8] & 0x3F | 0x80  # RFC 4122 variant
+    digits = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)[np.stack([raw >> 4, raw & 0x0F], axis=2).reshape(count, 32)]
+    text = np.insert(digits, [8, 12, 16, 20], ord('-'), axis=1)
+    return text.view('S36').ravel().astype('U36').tolist()
+
+def parse_amounts(values):
+    """Numbers from statement text like "1,234.50", "₹ 99" or "(12.00)"; blanks and junk become NaN."""
+    amounts = pd.to_numeric(values, errors='coerce')
+    # Only the values that aren't plain numbers go through the regex clean-up.
+    messy = amounts.isna() & values.notna()
+    if messy.any():
+        cleaned = values[messy].str.strip().str.replace(r'^\((.*)\)$', r'-\1', regex=True).str.replace(r'[^\d.\-]', '', regex=True)
+        amounts[messy] = pd.to_numeric(cleaned, errors='coerce')
+    return amounts
+
+def parse_statement(source, columns=None, date_format=None, dayfirst=False):
+    """Reads a bank-statement CSV into transaction records. Returns (records, skipped), where
+    skipped counts rows without a readable date or a non-zero amount."""
+    columns = {**STATEMENT_COLUMNS, **{key: value for key, value in (columns or {}).items() if value or key in ('description', 'category')}}
+    if columns['debit'] or columns['credit']: columns['amount'] = None
+    frame = pd.read_csv(source, usecols=[c for c in columns.values() if c], dtype=str, skipinitialspace=True)
+    dates = pd.to_datetime(frame[columns['date']], format=date_format, dayfirst=dayfirst, errors='coerce')
+    if columns['amount']:
+        amounts = parse_amounts(frame[columns['amount']])
+    else:
+        credits = parse_amounts(frame[columns['credit']]).fillna(0) if columns['credit'] else 0
+        debits = parse_amounts(frame[columns['debit']]).fillna(0) if columns['debit'] else 0
+        amounts = credits - debits
+    valid = dates.notna() & amounts.notna() & (amounts != 0)
+    frame, dates, amounts = frame[valid], dates[valid], amounts[valid]
+    types = pd.Series(np.where(amounts > 0, 'Income', 'Expense'), index=frame.index)
+    categories = types.map(DEFAULT_IMPORT_CATEGORY)
+    if columns['category']: categories = frame[columns['category']].str.strip().replace('', np.nan).fillna(categories)
+    descriptions = frame[columns['description']].fillna('').str.strip().tolist() if columns['description'] else [''] * len(frame)
+    # Zipping plain lists into dict displays is several times faster than DataFrame.to_dict
+    # for string columns, and than dict(zip(fields, row)).
+    rows = zip(bulk_uuid4(len(frame)), dates.dt.strftime('%Y-%m-%d').tolist(), descriptions, categories.tolist(), types.tolist(), amounts.abs().round(2).tolist())
+    records = [{'id': i, 'date': d, 'description': s, 'category': c, 'type': t, 'amount': a} for i, d, s, c, t, a in rows]
+    return records, int((~valid).sum())
+
+def import_statement(source, **options):
+    records, skipped = parse_statement(source, **options)
+    append_records(records, TRANSACTIONS_FILE, copy=False)
+    return len(records), skipped
+
 # --- FLASK ROUTES ---
+@app.before_request
+def start_background_workers():
+    if quote_refresher.interval and not quote_refresher.running: quote_refresher.start()
 
 @app.route('/')
 def dashboard():
-    transactions = load_data(TRANSACTIONS_FILE)
-    investments = load_data(INVESTMENTS_FILE)
-    df_trans = pd.DataFrame(transactions) if transactions else pd.DataFrame()
-    total_income = df_trans[df_trans['type'] == 'Income']['amount'].sum() if not df_trans.empty and 'type' in df_trans.columns else 0
-    total_spends = df_trans[df_trans['type'] == 'Expense']['amount'].sum() if not df_trans.empty and 'type' in df_trans.columns else 0
-    enriched_investments = enrich_investments_data(investments)
+    totals = aggregates.current()
+    total_income = totals['by_type'].get('Income', 0)
+    total_spends = totals['by_type'].get('Expense', 0)
+    enriched_investments = enrich_investments_data(load_data(INVESTMENTS_FILE))
     portfolio_value = sum(inv['current_value'] for inv in enriched_investments)
-    bank_balance = total_income - total_spends - sum(inv['amount_invested'] for inv in investments)
+    bank_balance = total_income - total_spends - totals['by_type'].get('Investment', 0)
     net_worth = bank_balance + portfolio_value
     spend_categories = {}
-    if not df_trans.empty and 'type' in df_trans.columns:
-        spends_df = df_trans[df_trans['type'] == 'Expense']
-        if not spends_df.empty:
-            category_summary = spends_df.groupby('category')['amount'].sum().abs().to_dict()
-            spend_categories = json.dumps(category_summary)
+    category_summary = totals['by_category'].get('Expense', {})
+    if category_summary:
+        spend_categories = json.dumps({category: abs(amount) for category, amount in category_summary.items()})
     return render_template('dashboard.html', net_worth=net_worth, bank_balance=bank_balance, portfolio_value=portfolio_value, spend_categories_data=spend_categories)
 
 @app.route('/income', methods=['GET', 'POST'])
 def income_page():
-    transactions = load_data(TRANSACTIONS_FILE)
     today_date = datetime.now().strftime('%Y-%m-%d')
     if request.method == 'POST':
         new_trans = {'id': str(uuid.uuid4()), 'date': request.form['date'], 'description': request.form['description'], 'category': request.form['category'], 'type': 'Income', 'amount': float(request.form['amount'])}
-        transactions.append(new_trans)
-        save_data(transactions, TRANSACTIONS_FILE)
+        append_record(new_trans, TRANSACTIONS_FILE)
         flash('Income entry added successfully!', 'success')
         return redirect(url_for('income_page'))
-    income_transactions = sorted([t for t in transactions if t['type'] == 'Income'], key=lambda x: x['date'], reverse=True)
-    return render_template('income.html', transactions=income_transactions, categories=INCOME_CATEGORIES, today_date=today_date)
+    income_transactions = query_data(TRANSACTIONS_FILE, record_type='Income', newest_first=True)
+    return render_table_page('income.html', len(income_transactions), transactions=income_transactions, categories=INCOME_CATEGORIES, today_date=today_date)
 
 @app.route('/expenses', methods=['GET', 'POST'])
 def expenses_page():
-    transactions = load_data(TRANSACTIONS_FILE)
     today_date = datetime.now().strftime('%Y-%m-%d')
     if request.method == 'POST':
         new_trans = {'id': str(uuid.uuid4()), 'date': request.form['date'], 'description': request.form['description'], 'category': request.form['category'], 'type': 'Expense', 'amount': float(request.form['amount'])}
-        transactions.append(new_trans)
-        save_data(transactions, TRANSACTIONS_FILE)
+        append_record(new_trans, TRANSACTIONS_FILE)
         flash('Expense added successfully!', 'success')
         return redirect(url_for('expenses_page'))
-    expense_transactions = sorted([t for t in transactions if t['type'] == 'Expense'], key=lambda x: x['date'], reverse=True)
-    return render_template('expenses.html', transactions=expense_transactions, categories=EXPENSE_CATEGORIES, today_date=today_date)
+    expense_transactions = query_data(TRANSACTIONS_FILE, record_type='Expense', newest_first=True)
+    return render_table_page('expenses.html', len(expense_transactions), transactions=expense_transactions, categories=EXPENSE_CATEGORIES, today_date=today_date)
 
 @app.route('/investments', methods=['GET', 'POST'])
 def investments_page():
-    investments = load_data(INVESTMENTS_FILE)
     today_date = datetime.now().strftime('%Y-%m-%d')
     if request.method == 'POST':
         purchase_date = request.form['purchase_date']
@@ -161,65 +1812,322 @@ def investments_page():
             return redirect(url_for('investments_page'))
         units = amount_invested / purchase_price if purchase_price > 0 else 0
         new_inv = {'id': str(uuid.uuid4()), 'purchase_date': purchase_date, 'name': request.form['name'], 'ticker': ticker, 'type': request.form['type'], 'amount_invested': amount_invested, 'purchase_price': purchase_price, 'units': units}
-        investments.append(new_inv)
-        save_data(investments, INVESTMENTS_FILE)
+        append_record(new_inv, INVESTMENTS_FILE)
         flash('Investment added successfully!', 'success')
         return redirect(url_for('investments_page'))
-    enriched_investments = enrich_investments_data(investments)
-    return render_template('investments.html', investments=enriched_investments, today_date=today_date)
+    investments = load_data(INVESTMENTS_FILE)
+    return render_table_page('investments.html', len(investments), investments=iter_enriched_investments(investments), today_date=today_date)
+
+def transaction_activity(t):
+    return {'id': t.get('id'), 'source': 'transaction', 'date': t['date'], 'description': t['description'], 'category': t['category'], 'type': t['type'], 'amount': t['amount']}
+
+def investment_activity(i):
+    return {'id': i.get('id'), 'source': 'investment', 'date': i['purchase_date'], 'description': i['name'], 'category': 'Investment Purchase', 'type': 'Investment', 'amount': -i['amount_invested']}
+
+def dataset_activities(file_path, to_activity, before, start_date, end_date):
+    for key, record in get_date_index(file_path).newest_first(before, start_date, end_date):
+        yield key, to_activity(record)
+
+def activity_feed(before=None, start_date=None, end_date=None):
+    """Lazily merges transactions and investments newest first as ((date, id), activity)
+    pairs. Each source is already in date order, so nothing is sorted and only the rows
+    a caller consumes are ever built."""
+    sources = [dataset_activities(TRANSACTIONS_FILE, transaction_activity, before, start_date, end_date),
+               dataset_activities(INVESTMENTS_FILE, investment_activity, before, start_date, end_date)]
+    return heapq.merge(*sources, key=lambda pair: pair[0], reverse=True)
 
 @app.route('/transactions')
 def transactions_view():
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-    start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else None
-    end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else None
-    transactions = load_data(TRANSACTIONS_FILE)
-    investments = load_data(INVESTMENTS_FILE)
-    filtered_transactions = [t for t in transactions if ((not start_date or datetime.strptime(t['date'], '%Y-%m-%d') >= start_date) and (not end_date or datetime.strptime(t['date'], '%Y-%m-%d') <= end_date))]
-    filtered_investments = [i for i in investments if ((not start_date or datetime.strptime(i['purchase_date'], '%Y-%m-%d') >= start_date) and (not end_date or datetime.strptime(i['purchase_date'], '%Y-%m-%d') <= end_date))]
-    all_activities = []
-    total_income = 0
-    total_expenses = 0
-    total_invested = 0
-    for t in filtered_transactions:
-        all_activities.append({'id': t.get('id'), 'source': 'transaction', 'date': t['date'], 'description': t['description'], 'category': t['category'], 'type': t['type'], 'amount': t['amount']})
-        if t['type'] == 'Income': total_income += t['amount']
-        else: total_expenses += t['amount']
-    for i in filtered_investments:
-        all_activities.append({'id': i.get('id'), 'source': 'investment', 'date': i['purchase_date'], 'description': i['name'], 'category': 'Investment Purchase', 'type': 'Investment', 'amount': -i['amount_invested']})
-        total_invested += i['amount_invested']
-    all_activities.sort(key=lambda x: x['date'], reverse=True)
-    return render_template('transactions.html', activities=all_activities, total_income=total_income, total_expenses=abs(total_expenses), total_invested=total_invested, start_date=start_date_str, end_date=end_date_str)
+    start_date_str = request.args.get('start_date') or None
+    end_date_str = request.args.get('end_date') or None
+    cursor = request.args.get('cursor') or None
+    per_page = min(max(request.args.get('per_page', TRANSACTIONS_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    feed = activity_feed(parse_cursor(cursor), start_date_str, end_date_str)
+    page = list(itertools.islice(feed, per_page + 1))
+    next_cursor = ','.join(page[per_page - 1][0]) if len(page) > per_page else None
+    all_activities = [activity for _, activity in page[:per_page]]
+    totals_by_type = aggregates.range_totals(start_date_str, end_date_str)
+    total_income = totals_by_type.get('Income', 0)
+    total_expenses = sum(amount for record_type, amount in totals_by_type.items() if record_type not in ('Income', 'Investment'))
+    total_invested = totals_by_type.get('Investment', 0)
+    return render_table_page('transactions.html', len(all_activities), activities=all_activities, total_income=total_income, total_expenses=abs(total_expenses), total_invested=total_invested, start_date=start_date_str, end_date=end_date_str, cursor=cursor, next_cursor=next_cursor, per_page=per_page)
+
+# --- BULK INSERT API ---
+# Each endpoint takes a JSON array of records, checks all of them before writing anything,
+# and adds the whole batch with one storage write. Errors come back as a list of
+# {index, error} entries and nothing is saved.
+def valid_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d') == value
+    except (TypeError, ValueError):
+        return False
+
+def valid_amount(value):
+    """A positive, finite JSON number; Infinity and NaN parse as floats, and ints too large
+    for a float would overflow when stored."""
+    if not isinstance(value, (int, float)) or isinstance(value, bool): return False
+    try:
+        return math.isfinite(value) and value > 0
+    except OverflowError:
+        return False
+
+def validate_transaction(item):
+    if not isinstance(item, dict): return 'record must be an object'
+    if not valid_date(item.get('date')): return 'date must be YYYY-MM-DD'
+    if item.get('type') not in ('Income', 'Expense'): return 'type must be Income or Expense'
+    if not isinstance(item.get('category'), str) or not item['category'].strip(): return 'category is required'
+    if not valid_amount(item.get('amount')): return 'amount must be a positive number'
+    if not isinstance(item.get('description', ''), str): return 'description must be a string'
+    return None
+
+def validate_investment(item):
+    if not isinstance(item, dict): return 'record must be an object'
+    if not valid_date(item.get('purchase_date')): return 'purchase_date must be YYYY-MM-DD'
+    if not isinstance(item.get('ticker'), str) or not item['ticker'].strip(): return 'ticker is required'
+    if item.get('type') not in INVESTMENT_TYPES: return f"type must be one of {', '.join(INVESTMENT_TYPES)}"
+    if not valid_amount(item.get('amount_invested')): return 'amount_invested must be a positive number'
+    if 'purchase_price' in item and not valid_amount(item['purchase_price']): return 'purchase_price must be a positive number'
+    if not isinstance(item.get('name', ''), str): return 'name must be a string'
+    return None
+
+def bulk_items(validate):
+    """The request's JSON array and the validation errors in it."""
+    items = request.get_json(silent=True)
+    if not isinstance(items, list): return None, [{'index': None, 'error': 'body must be a JSON array of records'}]
+    errors = [{'index': i, 'error': error} for i, error in enumerate(map(validate, items)) if error]
+    return items, errors
+
+@app.route('/api/transactions/bulk', methods=['POST'])
+def bulk_add_transactions():
+    items, errors = bulk_items(validate_transaction)
+    if errors: return jsonify({'errors': errors}), 400
+    records = [{'id': record_id, 'date': item['date'], 'description': item.get('description', ''), 'category': item['category'].strip(), 'type': item['type'], 'amount': float(item['amount'])} for record_id, item in zip(bulk_uuid4(len(items)), items)]
+    append_records(records, TRANSACTIONS_FILE)
+    return jsonify({'added': len(records), 'ids': [r['id'] for r in records]}), 201
+
+@app.route('/api/investments/bulk', methods=['POST'])
+def bulk_add_investments():
+    items, errors = bulk_items(validate_investment)
+    if errors: return jsonify({'errors': errors}), 400
+    for item in items: item['ticker'] = item['ticker'].strip().upper()
+    prices = get_historical_prices((item['ticker'], item['purchase_date']) for item in items if 'purchase_price' not in item)
+    errors = [{'index': i, 'error': f"no historical price for {item['ticker']} on {item['purchase_date']}"} for i, item in enumerate(items) if 'purchase_price' not in item and (item['ticker'], item['purchase_date']) not in prices]
+    if errors: return jsonify({'errors': errors}), 400
+    records = []
+    for record_id, item in zip(bulk_uuid4(len(items)), items):
+        amount_invested = float(item['amount_invested'])
+        purchase_price = float(item.get('purchase_price') or prices[(item['ticker'], item['purchase_date'])])
+        records.append({'id': record_id, 'purchase_date': item['purchase_date'], 'name': item.get('name', ''), 'ticker': item['ticker'], 'type': item['type'], 'amount_invested': amount_invested, 'purchase_price': purchase_price, 'units': amount_invested / purchase_price if purchase_price > 0 else 0})
+    append_records(records, INVESTMENTS_FILE)
+    return jsonify({'added': len(records), 'ids': [r['id'] for r in records]}), 201
+
+# --- EDIT AND FETCH ROUTES ---
+@app.route('/edit_transaction/<transaction_id>', methods=['GET', 'POST'])
+def edit_transaction(transaction_id):
+    transaction = get_record(transaction_id, TRANSACTIONS_FILE)
+    if transaction is None:
+        flash('Transaction not found.', 'danger')
+        return redirect(url_for('transactions_view'))
+    if request.method == 'POST':
+        # Deleted by someone else since the lookup above: there is nothing left to update.
+        if update_record(transaction_id, {'date': request.form['date'], 'description': request.form['description'], 'category': request.form['category'], 'amount': float(request.form['amount'])}, TRANSACTIONS_FILE) is None:
+            flash('Transaction not found.', 'danger')
+            return redirect(url_for('transactions_view'))
+        flash('Transaction updated successfully.', 'success')
+        return redirect(url_for('income_page' if transaction['type'] == 'Income' else 'expenses_page'))
+    categories = INCOME_CATEGORIES if transaction['type'] == 'Income' else EXPENSE_CATEGORIES
+    return render_template('edit_transaction.html', transaction=transaction, categories=categories)
+
+@app.route('/api/transactions/<transaction_id>')
+def get_transaction_api(transaction_id):
+    transaction = get_record(transaction_id, TRANSACTIONS_FILE)
+    return jsonify(dict(transaction)) if transaction else (jsonify({'error': 'not found'}), 404)
+
+@app.route('/api/investments/<investment_id>')
+def get_investment_api(investment_id):
+    investment = get_record(investment_id, INVESTMENTS_FILE)
+    return jsonify(dict(investment)) if investment else (jsonify({'error': 'not found'}), 404)
 
 # --- DELETE ROUTES ---
 @app.route('/delete_transaction/<transaction_id>', methods=['POST'])
 def delete_transaction(transaction_id):
-    transactions = load_data(TRANSACTIONS_FILE)
-    transactions = [t for t in transactions if t.get('id') != transaction_id]
-    save_data(transactions, TRANSACTIONS_FILE)
+    delete_record(transaction_id, TRANSACTIONS_FILE)
     flash('Transaction deleted successfully.', 'success')
     return redirect(request.referrer or url_for('dashboard'))
 
 @app.route('/delete_investment/<investment_id>', methods=['POST'])
 def delete_investment(investment_id):
-    investments = load_data(INVESTMENTS_FILE)
-    investments = [i for i in investments if i.get('id') != investment_id]
-    save_data(investments, INVESTMENTS_FILE)
+    delete_record(investment_id, INVESTMENTS_FILE)
     flash('Investment deleted successfully.', 'success')
     return redirect(request.referrer or url_for('investments_page'))
 
+@app.route('/api/transactions/bulk-delete', methods=['POST'])
+def bulk_delete_transactions():
+    return bulk_delete(TRANSACTIONS_FILE)
+
+@app.route('/api/investments/bulk-delete', methods=['POST'])
+def bulk_delete_investments():
+    return bulk_delete(INVESTMENTS_FILE)
+
+def bulk_delete(file_path):
+    """Deletes every id in the request's JSON array with one storage write; unknown ids are ignored."""
+    record_ids = request.get_json(silent=True)
+    if not isinstance(record_ids, list) or not all(isinstance(record_id, str) for record_id in record_ids):
+        return jsonify({'error': 'body must be a JSON array of ids'}), 400
+    return jsonify({'deleted': delete_records(record_ids, file_path)})
+
+@app.route('/import', methods=['GET', 'POST'])
+def import_page():
+    if request.method == 'POST':
+        upload = request.files.get('statement')
+        if not upload or not upload.filename:
+            flash('Choose a CSV file to import.', 'danger')
+            return redirect(url_for('import_page'))
+        columns = {key: request.form.get(f'{key}_column', '').strip() for key in STATEMENT_COLUMNS}
+        try:
+            imported, skipped = import_statement(upload.stream, columns=columns, date_format=request.form.get('date_format') or None, dayfirst=bool(request.form.get('dayfirst')))
+        except (ValueError, KeyError) as e:
+            flash(f'Error: Could not read the statement: {e}', 'danger')
+            return redirect(url_for('import_page'))
+        flash(f'Imported {imported} transactions' + (f', skipped {skipped} rows without a date or amount.' if skipped else '.'), 'success')
+        return redirect(url_for('transactions_view'))
+    return render_template('import.html', columns=STATEMENT_COLUMNS)
+
+# --- EXPORT ---
+# /export writes an xlsx workbook with both datasets. ?format=csv and ?format=parquet export
+# one dataset (?dataset=transactions or investments) in EXPORT_CHUNK_ROWS-row chunks: CSV is
+# streamed as it is written, Parquet gets one row group per chunk. Parquet needs pyarrow.
+EXPORT_CHUNK_ROWS = 10000
+# Low-cardinality text columns stored dictionary-encoded in Parquet.
+EXPORT_DICTIONARY_COLUMNS = {'type', 'category', 'ticker', 'name', 'tax_status'}
+
+def chunked(rows, size=EXPORT_CHUNK_ROWS):
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, size)): yield chunk
+
+def write_sheet(workbook, title, rows, columns):
+    sheet = workbook.create_sheet(title)
+    sheet.append(columns)
+    for row in rows: sheet.append([row.get(column) for column in columns])
+
+def iter_csv(rows, columns):
+    """Yields the CSV header, then one string per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, columns, extrasaction='ignore')
+    writer.writeheader()
+    for chunk in chunked(rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def parquet_schema(chunk, columns):
+    """Infers column types from the first chunk. Columns that are empty there become strings,
+    and the EXPORT_DICTIONARY_COLUMNS become dictionary-encoded strings."""
+    inferred = pa.Table.from_pylist(chunk).schema
+    fields = []
+    for column in columns:
+        field_type = inferred.field(column).type if column in inferred.names else pa.null()
+        if pa.types.is_null(field_type): field_type = pa.string()
+        if column in EXPORT_DICTIONARY_COLUMNS and pa.types.is_string(field_type): field_type = pa.dictionary(pa.int32(), pa.string())
+        fields.append(pa.field(column, field_type))
+    return pa.schema(fields)
+
+def write_parquet(output, rows, columns):
+    writer = None
+    for chunk in chunked(rows):
+        if writer is None: writer = pq.ParquetWriter(output, parquet_schema(chunk, columns))
+        writer.write_table(pa.Table.from_pylist(chunk, schema=writer.schema), row_group_size=EXPORT_CHUNK_ROWS)
+    if writer is None: writer = pq.ParquetWriter(output, pa.schema([pa.field(column, pa.string()) for column in columns]))
+    writer.close()
+
+def record_columns(records, extra=()):
+    # Keys are streamed into the dict rather than listed first, which would cost a
+    # pointer per field of every record.
+    return list(dict.fromkeys(itertools.chain(itertools.chain.from_iterable(records), extra))) if records else []
+
 @app.route('/export')
 def export_excel():
+    export_format = request.args.get('format', 'xlsx')
+    dataset = request.args.get('dataset', 'transactions')
+    if export_format not in ('xlsx', 'csv', 'parquet') or dataset not in ('transactions', 'investments'):
+        return jsonify({'error': 'format must be xlsx, csv or parquet and dataset transactions or investments'}), 400
+    if export_format == 'parquet' and pq is None:
+        return jsonify({'error': 'parquet export needs pyarrow installed'}), 501
+    # Rows go straight from the store to the output (xlsx and parquet via a temp file that
+    # send_file then streams), so memory stays flat however long the history is.
     transactions = load_data(TRANSACTIONS_FILE)
-    investments = load_data(INVESTMENTS_FILE)
-    enriched_investments = enrich_investments_data(investments)
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        pd.DataFrame(transactions).to_excel(writer, sheet_name='Transactions', index=False)
-        pd.DataFrame(enriched_investments).to_excel(writer, sheet_name='Investment_Portfolio', index=False)
+    investments = load_data(INVESTMENTS_FILE) if export_format == 'xlsx' or dataset == 'investments' else ()
+    # Prices come from what is already cached, each row carrying its own price_as_of;
+    # ?refresh=1 fetches fresh quotes for every holding first, in one batched call.
+    tickers = [inv['ticker'] for inv in investments]
+    quotes = get_live_quotes(tickers, force=True) if request.args.get('refresh') == '1' else get_cached_quotes(tickers)
+    if export_format == 'xlsx':
+        # openpyxl 3.1+ writes strings inline in write-only mode, so there is no shared-strings
+        # table growing with the number of distinct descriptions.
+        workbook = Workbook(write_only=True)
+        write_sheet(workbook, 'Transactions', transactions, record_columns(transactions))
+        write_sheet(workbook, 'Investment_Portfolio', iter_enriched_investments(investments, quotes), record_columns(investments, ENRICHED_COLUMNS))
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return send_file(output, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', download_name='financial_report.xlsx', as_attachment=True)
+    if dataset == 'transactions':
+        rows, columns = transactions, record_columns(transactions)
+    else:
+        rows, columns = iter_enriched_investments(investments, quotes), record_columns(investments, ENRICHED_COLUMNS)
+    if export_format == 'csv':
+        return Response(iter_csv(rows, columns), mimetype='text/csv', headers={'Content-Disposition': f'attachment; filename={dataset}.csv'})
+    output = tempfile.TemporaryFile()
+    write_parquet(output, rows, columns)
     output.seek(0)
-    return send_file(output, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', download_name='financial_report.xlsx', as_attachment=True)
+    return send_file(output, mimetype='application/vnd.apache.parquet', download_name=f'{dataset}.parquet', as_attachment=True)
+
+# --- CLI COMMANDS ---
+@app.cli.command('migrate-to-sqlite')
+def migrate_to_sqlite():
+    """Copies the JSON data files into the SQLite database (run once before switching FINTRACK_STORAGE to sqlite)."""
+    source, target = JsonStorage(), SqliteStorage(DATABASE_FILE)
+    source.setup()
+    target.setup()
+    for file_path in DATASET_FIELDS:
+        records = source.load(file_path)
+        target.save(records, file_path)
+        print(f"Migrated {len(records)} records from {file_path} to {DATABASE_FILE}")
+
+@app.cli.command('warm-price-cache')
+def warm_price_cache():
+    """Backfills the historical price store for every ticker held in investments.json."""
+    first_purchase = {}
+    for inv in load_data(INVESTMENTS_FILE):
+        if is_cash_ticker(inv['ticker']): continue
+        first_purchase[inv['ticker']] = min(inv['purchase_date'], first_purchase.get(inv['ticker'], inv['purchase_date']))
+    tomorrow = shift_date(datetime.now().strftime('%Y-%m-%d'), 1)
+    for ticker, purchase_date in sorted(first_purchase.items()):
+        try:
+            price_store.ensure_range(ticker, shift_date(purchase_date, -4), tomorrow)
+            print(f"Cached price history for {ticker} from {purchase_date}")
+        except Exception as e:
+            print(f"Error caching price history for {ticker}: {e}")
+
+@app.cli.command('import-statement')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--date-column', default=STATEMENT_COLUMNS['date'], show_default=True)
+@click.option('--description-column', default=STATEMENT_COLUMNS['description'], show_default=True)
+@click.option('--amount-column', default=STATEMENT_COLUMNS['amount'], show_default=True, help='Signed amount, credits positive.')
+@click.option('--debit-column', help='Use with --credit-column instead of a signed amount column.')
+@click.option('--credit-column')
+@click.option('--category-column', help='Rows without one get Other Income / Other Expense.')
+@click.option('--date-format', help='strptime format, e.g. %d/%m/%Y; inferred if omitted.')
+@click.option('--dayfirst', is_flag=True, help='Read ambiguous dates as day/month.')
+def import_statement_command(path, date_column, description_column, amount_column, debit_column, credit_column, category_column, date_format, dayfirst):
+    """Imports a bank-statement CSV into transactions in a single write."""
+    setup_data_files()
+    columns = {'date': date_column, 'description': description_column, 'amount': amount_column, 'debit': debit_column, 'credit': credit_column, 'category': category_column}
+    start = time.perf_counter()
+    imported, skipped = import_statement(path, columns=columns, date_format=date_format, dayfirst=dayfirst)
+    print(f"Imported {imported} transactions from {path} in {time.perf_counter() - start:.2f}s ({skipped} rows skipped)")
 
 # --- INITIALIZATION ---
 if __name__ == '__main__':
@@ -0,0 +1,76 @@
+"""Shared setup for the scripts in bench/. Each run works in a throwaway data directory
+and never reaches the network."""
+import os
+import sys
+import random
+import resource
+import statistics
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INCOME_CATEGORIES = ["Salary", "Freelance", "Bonus", "Other Income"]
+EXPENSE_CATEGORIES = ["Rent", "Groceries", "Utilities", "Transportation", "Dining Out", "Shopping", "Travel", "Other Expense"]
+
+
+def load_app(storage='json', directory=None):
+    """Imports app.py with its data directory in `directory` (a fresh temp dir by default)
+    and the quote refresher off."""
+    os.environ['FINTRACK_STORAGE'] = storage
+    os.environ['FINTRACK_QUOTE_REFRESH'] = '0'
+    os.chdir(directory or tempfile.mkdtemp(prefix='fintrack-bench-'))
+    sys.path.insert(0, ROOT)
+    import app
+    app.setup_data_files()
+    app.quote_provider = app.StaticQuoteProvider({})
+    return app
+
+
+def make_transactions(count, years=10, seed=0):
+    """count income/expense records spread over the last `years` years."""
+    rng = random.Random(seed)
+    start = time.time() - years * 365 * 86400
+    records = []
+    for i in range(count):
+        income = rng.random() < 0.2
+        records.append({
+            'id': f'{i:032x}',
+            'date': time.strftime('%Y-%m-%d', time.localtime(start + rng.random() * years * 365 * 86400)),
+            'description': f'Transaction {i}',
+            'category': rng.choice(INCOME_CATEGORIES if income else EXPENSE_CATEGORIES),
+            'type': 'Income' if income else 'Expense',
+            'amount': round(rng.uniform(10, 5000), 2),
+        })
+    return records
+
+
+def timed(fn, repeat=5):
+    """Median wall time of fn() in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def peak_rss_mb():
+    """Highest resident set size since start or the last reset_peak_rss() (Linux only)."""
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1024
+
+
+def reset_peak_rss():
+    """Starts peak_rss_mb() over from the current RSS, so a measurement excludes what came before it."""
+    with open('/proc/self/clear_refs', 'w') as f: f.write('5')
+
+
+def rss_mb():
+    """Current resident set size (Linux only)."""
+    with open('/proc/self/statm') as f: return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+
+def sizes(default):
+    """Row counts from the command line, e.g. `python bench/insert_cost.py 10000 400000`."""
+    return [int(arg) for arg in sys.argv[1:]] or default
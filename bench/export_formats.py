@@ -0,0 +1,28 @@
+"""Export throughput of CSV and Parquet against xlsx (GET /export?dataset=transactions).
+
+    python bench/export_formats.py [rows ...]
+"""
+import time
+
+from common import load_app, make_transactions, sizes
+
+app = load_app()
+client = app.app.test_client()
+
+
+def export(export_format):
+    """(seconds, bytes) for one full download."""
+    start = time.perf_counter()
+    response = client.get(f'/export?format={export_format}&dataset=transactions', buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    return time.perf_counter() - start, size
+
+
+print(f"{'rows':>9} {'format':>8} {'wall s':>7} {'rows/s':>9} {'file MB':>8} {'vs xlsx':>8}")
+for count in sizes([100_000]):
+    app.save_data(make_transactions(count), app.TRANSACTIONS_FILE)
+    app.load_data(app.TRANSACTIONS_FILE)
+    results = {export_format: export(export_format) for export_format in ('xlsx', 'csv', 'parquet')}
+    for export_format, (seconds, size) in results.items():
+        print(f"{count:>9} {export_format:>8} {seconds:>7.2f} {count / seconds:>9.0f} {size / 2**20:>8.1f} {results['xlsx'][0] / seconds:>7.1f}x")
@@ -0,0 +1,49 @@
+"""Peak RSS and wall time of the xlsx export (GET /export) at 100k and 1M transactions.
+
+The data is written by one process and exported by a fresh one. The peak is reset once
+the records are loaded, so growth is what the export itself adds on top of them; parsing
+the JSON files briefly peaks higher than the loaded records and would otherwise be
+counted against the export.
+
+    python bench/export_memory.py [rows ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import load_app, make_transactions, peak_rss_mb, reset_peak_rss, rss_mb, sizes
+
+
+def generate(directory, count):
+    app = load_app(directory=directory)
+    app.save_data(make_transactions(count), app.TRANSACTIONS_FILE)
+
+
+def export(directory, export_format):
+    app = load_app(directory=directory)
+    client = app.app.test_client()
+    count = len(app.load_data(app.TRANSACTIONS_FILE))
+    loaded_mb = rss_mb()
+    reset_peak_rss()
+    start = time.perf_counter()
+    response = client.get(f'/export?format={export_format}', buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    wall_s = time.perf_counter() - start
+    print(f"{count:>9} {export_format:>7} {wall_s:>7.1f} {size / 2**20:>8.1f} {loaded_mb:>10.0f} {peak_rss_mb():>8.0f} {peak_rss_mb() - loaded_mb:>10.0f}", flush=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'generate':
+        generate(sys.argv[2], int(sys.argv[3]))
+    elif len(sys.argv) > 1 and sys.argv[1] == 'export':
+        export(sys.argv[2], sys.argv[3])
+    else:
+        script = os.path.abspath(__file__)
+        print(f"{'rows':>9} {'format':>7} {'wall s':>7} {'file MB':>8} {'loaded MB':>10} {'peak MB':>8} {'growth MB':>10}")
+        for count in sizes([100_000, 1_000_000]):
+            directory = tempfile.mkdtemp(prefix='fintrack-bench-')
+            subprocess.run([sys.executable, script, 'generate', directory, str(count)], check=True)
+            subprocess.run([sys.executable, script, 'export', directory, 'xlsx'], check=True)
@@ -0,0 +1,34 @@
+"""Bank-statement CSV import (import_statement) throughput, split into parsing the CSV
+and the single write that stores the records and folds them into the aggregates.
+
+    python bench/import_statement.py [rows ...]
+"""
+import os
+import random
+import time
+
+from common import load_app, sizes
+
+app = load_app()
+
+
+def write_statement(path, count, seed=0):
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        f.write('Date,Description,Amount\n')
+        for i in range(count):
+            f.write(f'{rng.randrange(2015, 2025)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d},Card payment {i},{rng.uniform(-5000, 5000):.2f}\n')
+
+
+print(f"{'rows':>9} {'parse s':>8} {'write s':>8} {'total s':>8} {'rows/s':>9}")
+for count in sizes([100_000, 1_000_000]):
+    path = os.path.abspath(f'statement-{count}.csv')
+    write_statement(path, count)
+    app.save_data([], app.TRANSACTIONS_FILE)
+    app.aggregates.current()
+    start = time.perf_counter()
+    records, _ = app.parse_statement(path)
+    parsed = time.perf_counter()
+    app.append_records(records, app.TRANSACTIONS_FILE, copy=False)
+    done = time.perf_counter()
+    print(f"{count:>9} {parsed - start:>8.2f} {done - parsed:>8.2f} {done - start:>8.2f} {count / (done - start):>9.0f}")
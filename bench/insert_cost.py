@@ -0,0 +1,21 @@
+"""Cost of one form insert (POST /expenses) as the history grows.
+
+The goal is a flat line: an insert should cost the same at 400k rows as at 10k. Caches
+and indexes are warmed first, the way a running server would have them.
+
+    python bench/insert_cost.py [rows ...]
+"""
+from common import load_app, make_transactions, sizes, timed
+
+app = load_app()
+client = app.app.test_client()
+form = {'date': '2024-05-01', 'description': 'Coffee', 'category': 'Dining Out', 'amount': '120'}
+
+print(f"{'rows':>10} {'insert ms':>10}")
+for count in sizes([10_000, 100_000, 400_000]):
+    app.save_data(make_transactions(count), app.TRANSACTIONS_FILE)
+    app.aggregates.current()
+    app.get_date_index(app.TRANSACTIONS_FILE)
+    app.get_id_index(app.TRANSACTIONS_FILE)
+    client.post('/expenses', data=form)
+    print(f"{count:>10} {timed(lambda: client.post('/expenses', data=form), repeat=21):>10.2f}")
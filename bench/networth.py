@@ -0,0 +1,39 @@
+"""Net worth history for 10 years of transactions and monthly purchases of 200 tickers.
+
+Daily closes for every ticker are written straight into the price store, so the run
+measures the price matrix math and never reaches the network.
+
+    python bench/networth.py [tickers ...]
+"""
+import random
+
+import numpy as np
+import pandas as pd
+
+from common import load_app, make_transactions, peak_rss_mb, sizes, timed
+
+YEARS = 10
+
+app = load_app()
+client = app.app.test_client()
+rng = random.Random(0)
+days = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=YEARS * 261)
+app.save_data(make_transactions(50_000, years=YEARS), app.TRANSACTIONS_FILE)
+
+print(f"{'tickers':>8} {'purchases':>10} {'closes':>10} {'history ms':>11} {'api ms':>10} {'peak MB':>8}")
+for count in sizes([200]):
+    tickers = [f'SYM{i:03d}.NS' for i in range(count)]
+    investments = []
+    for ticker in tickers:
+        walk = 100 * np.exp(np.cumsum(np.random.default_rng(rng.randrange(1 << 30)).normal(0, 0.01, len(days))))
+        app.price_store._store(ticker, dict(zip(days.strftime('%Y-%m-%d'), walk.round(2).tolist())))
+        for month in range(0, len(days), 21):
+            price = float(walk[month])
+            units = round(rng.uniform(1, 20), 3)
+            investments.append({'id': f'{len(investments):032x}', 'ticker': ticker, 'units': units, 'purchase_price': price,
+                                'amount_invested': round(units * price, 2), 'purchase_date': days[month].strftime('%Y-%m-%d')})
+    app.save_data(investments, app.INVESTMENTS_FILE)
+    app.net_worth_history()
+    history_ms = timed(app.net_worth_history)
+    api_ms = timed(lambda: client.get('/api/networth'))
+    print(f"{count:>8} {len(investments):>10} {count * len(days):>10} {history_ms:>11.0f} {api_ms:>10.0f} {peak_rss_mb():>8.0f}")
@@ -0,0 +1,32 @@
+"""Date-range queries over 1M transactions: the date index's binary search against the
+list comprehension /transactions used before, which parsed every record's date.
+
+    python bench/range_queries.py [rows ...]
+"""
+from datetime import datetime, timedelta
+
+from common import load_app, make_transactions, sizes, timed
+
+
+def scan(records, start_date_str, end_date_str):
+    start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+    end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+    return [t for t in records if datetime.strptime(t['date'], '%Y-%m-%d') >= start_date and datetime.strptime(t['date'], '%Y-%m-%d') <= end_date]
+
+
+app = load_app()
+end = datetime.now()
+ranges = {'week': 7, 'month': 30, 'year': 365, '10 years': 3660}
+
+print(f"{'rows':>8} {'range':>9} {'matches':>8} {'scan ms':>10} {'index ms':>10} {'speedup':>8}")
+for count in sizes([1_000_000]):
+    app.save_data(make_transactions(count), app.TRANSACTIONS_FILE)
+    records = app.load_data(app.TRANSACTIONS_FILE)
+    index = app.get_date_index(app.TRANSACTIONS_FILE)
+    for name, days in ranges.items():
+        start_date, end_date = (end - timedelta(days=days)).strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+        matches = index.between(start_date, end_date)
+        assert len(matches) == len(scan(records, start_date, end_date))
+        scan_ms = timed(lambda: scan(records, start_date, end_date), repeat=1)
+        index_ms = timed(lambda: index.between(start_date, end_date))
+        print(f"{count:>8} {name:>9} {len(matches):>8} {scan_ms:>10.1f} {index_ms:>10.3f} {scan_ms / index_ms:>7.0f}x")
@@ -0,0 +1,45 @@
+"""JSON vs SQLite storage at 10k, 100k and 1M transactions.
+
+Each backend runs in its own process, since the backend is picked when app.py is imported.
+
+    python bench/storage_backends.py [rows ...]
+"""
+import os
+import subprocess
+import sys
+import time
+
+from common import load_app, make_transactions, sizes, timed
+
+
+def run(backend, counts):
+    app = load_app(backend)
+    file_path = app.TRANSACTIONS_FILE
+    for count in counts:
+        records = make_transactions(count)
+        start = time.perf_counter()
+        app.save_data(records, file_path)
+        save_ms = (time.perf_counter() - start) * 1000
+
+        def cold_load():
+            app.invalidate_data_cache(file_path)
+            app.load_data(file_path)
+        load_ms = timed(cold_load, repeat=3)
+        app.get_date_index(file_path)
+        month_ms = timed(lambda: app.query_data(file_path, start_date='2020-03-01', end_date='2020-03-31'))
+        type_ms = timed(lambda: app.query_data(file_path, record_type='Income', newest_first=True))
+        new = {'date': '2024-05-01', 'description': 'Coffee', 'category': 'Dining Out', 'type': 'Expense', 'amount': 120.0}
+        insert_ms = timed(lambda: app.append_record(dict(new, id=app.bulk_uuid4(1)[0]), file_path))
+        ids = iter([r['id'] for r in records])
+        delete_ms = timed(lambda: app.delete_record(next(ids), file_path))
+        print(f"{backend:>7} {count:>10} {save_ms:>10.0f} {load_ms:>10.0f} {month_ms:>10.2f} {type_ms:>10.1f} {insert_ms:>10.2f} {delete_ms:>10.2f}", flush=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in ('json', 'sqlite'):
+        run(sys.argv[1], [int(arg) for arg in sys.argv[2:]])
+    else:
+        counts = [str(count) for count in sizes([10_000, 100_000, 1_000_000])]
+        print(f"{'backend':>7} {'rows':>10} {'save ms':>10} {'load ms':>10} {'month ms':>10} {'type ms':>10} {'insert ms':>10} {'delete ms':>10}")
+        for backend in ('json', 'sqlite'):
+            subprocess.run([sys.executable, os.path.abspath(__file__), backend, *counts], check=True)
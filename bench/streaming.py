@@ -0,0 +1,43 @@
+"""Time to first byte, total time and peak memory of the /expenses page with 200k rows,
+rendered whole and streamed.
+
+Peak memory is the largest amount Python had allocated at once while the request ran
+(tracemalloc), measured in a second pass so tracing doesn't skew the timings.
+
+    python bench/streaming.py [rows ...]
+"""
+import time
+import tracemalloc
+
+from common import load_app, make_transactions, sizes
+
+app = load_app()
+client = app.app.test_client()
+
+
+def fetch(url):
+    """(ms to first body chunk, ms to last, bytes) for one GET."""
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    first_byte, size = None, 0
+    for chunk in response.response:
+        if first_byte is None and chunk: first_byte = time.perf_counter()
+        size += len(chunk)
+    response.close()
+    return (first_byte - start) * 1000, (time.perf_counter() - start) * 1000, size
+
+
+print(f"{'rows':>8} {'mode':>9} {'ttfb ms':>10} {'total ms':>10} {'MB sent':>8} {'peak MB':>8}")
+for count in sizes([200_000]):
+    records = [dict(r, type='Expense', category='Groceries') for r in make_transactions(count)]
+    app.save_data(records, app.TRANSACTIONS_FILE)
+    app.get_date_index(app.TRANSACTIONS_FILE)
+    for mode, stream in (('rendered', 0), ('streamed', 1)):
+        url = f'/expenses?stream={stream}'
+        fetch(url)
+        ttfb_ms, total_ms, size = fetch(url)
+        tracemalloc.start()
+        fetch(url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{count:>8} {mode:>9} {ttfb_ms:>10.0f} {total_ms:>10.0f} {size / 2**20:>8.1f} {peak / 2**20:>8.1f}")
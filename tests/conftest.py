@@ -0,0 +1,83 @@
+"""Imports app.py once from a throwaway directory and gives every test fresh data files,
+caches and price stores under its own tmp_path. Nothing here reaches the network."""
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THREADS = 16
+
+os.environ.setdefault('FINTRACK_QUOTE_REFRESH', '0')
+os.chdir(tempfile.mkdtemp(prefix='fintrack-tests-'))
+sys.path.insert(0, ROOT)
+
+import app as fintrack  # noqa: E402
+
+
+def run_concurrently(fn, threads=THREADS):
+    """Calls fn(i) from each of threads threads, all released at once; returns the results
+    in thread order."""
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn(i)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers: w.start()
+    for w in workers: w.join(10)
+    return results
+
+
+class FakeClock:
+    """A clock that only moves when a test advances it."""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class CountingProvider(fintrack.StaticQuoteProvider):
+    """StaticQuoteProvider that records every upstream call it receives."""
+
+    def __init__(self, prices, history=None, latency=0.0):
+        super().__init__(prices, history, latency)
+        self.quote_calls = []
+        self.history_calls = []
+
+    def get_quotes(self, tickers):
+        self.quote_calls.append(sorted(tickers))
+        return super().get_quotes(tickers)
+
+    def get_history(self, ticker, start_date, end_date):
+        self.history_calls.append((ticker, start_date, end_date))
+        return super().get_history(ticker, start_date, end_date)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = fintrack.SqliteStorage(fintrack.DATABASE_FILE) if fintrack.STORAGE_BACKEND == 'sqlite' else fintrack.JsonStorage()
+    monkeypatch.setattr(fintrack, 'storage', storage)
+    monkeypatch.setattr(fintrack, 'aggregates', fintrack.Aggregates(fintrack.AGGREGATES_FILE))
+    monkeypatch.setattr(fintrack, 'quote_cache', fintrack.QuoteCache())
+    monkeypatch.setattr(fintrack, 'price_store', fintrack.PriceStore(fintrack.PRICES_DB_FILE))
+    monkeypatch.setattr(fintrack, 'quote_provider', fintrack.StaticQuoteProvider({}))
+    for cache in (fintrack._data_cache, fintrack._date_indexes, fintrack._id_indexes): cache.clear()
+    fintrack.setup_data_files()
+    yield fintrack
+    fintrack.aggregates.flush()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
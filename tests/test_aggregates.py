@@ -0,0 +1,38 @@
+import pytest
+
+
+def expense(i, amount):
+    return {'id': f'{i:032x}', 'date': '2024-03-05', 'description': f'Expense {i}', 'category': 'Groceries', 'type': 'Expense', 'amount': amount}
+
+
+def other_process_storage(app):
+    """A second storage object over the same files, standing in for another process."""
+    return app.SqliteStorage(app.DATABASE_FILE) if app.STORAGE_BACKEND == 'sqlite' else app.JsonStorage()
+
+
+def test_deferred_save_keeps_the_signatures_its_totals_were_computed_for(app):
+    app.append_records([expense(1, 10.0)], app.TRANSACTIONS_FILE)
+    other_process_storage(app).append_many([expense(2, 500.0)], app.TRANSACTIONS_FILE)
+    app.aggregates.flush()
+
+    reloaded = app.Aggregates(app.AGGREGATES_FILE)
+    assert reloaded.current()['by_type'] == {'Expense': 510.0}
+    assert app.aggregates.current()['by_type'] == {'Expense': 510.0}
+
+
+
+def test_compaction_writes_its_snapshot_outside_the_aggregates_lock(app, monkeypatch):
+    if app.STORAGE_BACKEND != 'json': pytest.skip('only the JSON backend compacts')
+    app.append_records([expense(1, 10.0)], app.TRANSACTIONS_FILE)
+    write_snapshot = app.JsonStorage._write_snapshot
+
+    def write_during_compaction(path, data):
+        assert app.aggregates._lock.acquire(blocking=False)
+        app.aggregates._lock.release()
+        app.append_records([expense(2, 500.0)], app.TRANSACTIONS_FILE)
+        write_snapshot(path, data)
+    monkeypatch.setattr(app.JsonStorage, '_write_snapshot', staticmethod(write_during_compaction))
+    app.compact_dataset(app.TRANSACTIONS_FILE)
+
+    assert [r['id'] for r in app.JsonStorage().load(app.TRANSACTIONS_FILE)] == [expense(1, 0)['id'], expense(2, 0)['id']]
+    assert app.aggregates.current()['by_type'] == {'Expense': 510.0}
@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.mark.parametrize('amount', ['Infinity', '-Infinity', 'NaN', '1e400', str(10 ** 400), 'true', '0', '-5', '"12"'])
+def test_bulk_insert_rejects_invalid_amounts(app, amount):
+    client = app.app.test_client()
+    body = f'[{{"date": "2024-03-05", "type": "Expense", "category": "Groceries", "amount": 12.5}}, {{"date": "2024-03-05", "type": "Expense", "category": "Groceries", "amount": {amount}}}]'
+
+    response = client.post('/api/transactions/bulk', data=body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'errors': [{'index': 1, 'error': 'amount must be a positive number'}]}
+    assert app.load_data(app.TRANSACTIONS_FILE) == ()
+
+
+def test_bulk_insert_rejects_infinite_investment_amounts(app):
+    client = app.app.test_client()
+    body = '[{"ticker": "TCS.NS", "purchase_date": "2024-03-05", "type": "Stock", "units": 2, "amount_invested": 100, "purchase_price": Infinity}]'
+
+    response = client.post('/api/investments/bulk', data=body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.get_json()['errors'][0]['error'] == 'purchase_price must be a positive number'
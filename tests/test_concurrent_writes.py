@@ -0,0 +1,49 @@
+from conftest import THREADS, run_concurrently
+
+
+def expense(i, amount=100.0):
+    return {'id': f'{i:032x}', 'date': '2024-03-05', 'description': f'Expense {i}', 'category': 'Groceries', 'type': 'Expense', 'amount': amount}
+
+
+def test_concurrent_deletes_of_one_record_subtract_it_once(app):
+    app.append_records([expense(i) for i in range(3)], app.TRANSACTIONS_FILE)
+
+    deleted = run_concurrently(lambda i: app.delete_records([expense(0)['id']], app.TRANSACTIONS_FILE))
+
+    assert sorted(deleted) == [0] * (THREADS - 1) + [1]
+    assert app.aggregates.current()['by_type'] == {'Expense': 200.0}
+    assert [r['id'] for r in app.load_data(app.TRANSACTIONS_FILE)] == [expense(1)['id'], expense(2)['id']]
+
+
+def test_concurrent_edits_and_deletes_keep_totals_consistent(app):
+    app.append_records([expense(i) for i in range(THREADS)], app.TRANSACTIONS_FILE)
+
+    def edit_or_delete(i):
+        # Every one of the first four records gets two edits and two deletes racing each other.
+        target = expense(i // 2 % 4)['id']
+        if i % 2: return app.update_record(target, {'amount': 10.0 * (i + 1)}, app.TRANSACTIONS_FILE)
+        return app.delete_records([target], app.TRANSACTIONS_FILE)
+
+    run_concurrently(edit_or_delete)
+
+    tracked = dict(app.aggregates.current()['by_type'])
+    app.aggregates.invalidate()
+    assert tracked == app.aggregates.current()['by_type']
+    assert {r['id'] for r in app.load_data(app.TRANSACTIONS_FILE)} == {expense(i)['id'] for i in range(4, THREADS)}
+
+
+def test_editing_a_record_deleted_meanwhile_reports_not_found(app, monkeypatch):
+    app.append_records([expense(1)], app.TRANSACTIONS_FILE)
+    update_record = app.update_record
+
+    def deleted_first(record_id, changes, file_path):
+        app.delete_record(record_id, file_path)
+        return update_record(record_id, changes, file_path)
+    monkeypatch.setattr(app, 'update_record', deleted_first)
+    client = app.app.test_client()
+
+    client.post(f'/edit_transaction/{expense(1)["id"]}', data={'date': '2024-03-06', 'description': 'Edited', 'category': 'Groceries', 'amount': '50'})
+
+    with client.session_transaction() as session:
+        assert session['_flashes'] == [('danger', 'Transaction not found.')]
+    assert app.load_data(app.TRANSACTIONS_FILE) == ()
@@ -0,0 +1,21 @@
+def expense(i, amount=100.0):
+    return {'id': f'{i:032x}', 'date': '2024-03-05', 'description': f'Expense {i}', 'category': 'Groceries', 'type': 'Expense', 'amount': amount}
+
+
+def test_writing_one_dataset_keeps_the_others_cache(app):
+    app.load_data(app.INVESTMENTS_FILE)
+    app.load_data(app.TRANSACTIONS_FILE)
+    before = dict(app.data_cache_stats)
+
+    app.append_records([expense(1)], app.TRANSACTIONS_FILE)
+    app.load_data(app.INVESTMENTS_FILE)
+
+    assert app.data_cache_stats['misses'] == before['misses']
+
+
+def test_writes_from_another_process_are_picked_up(app):
+    app.load_data(app.TRANSACTIONS_FILE)
+    other = app.SqliteStorage(app.DATABASE_FILE) if app.STORAGE_BACKEND == 'sqlite' else app.JsonStorage()
+    other.append_many([expense(1)], app.TRANSACTIONS_FILE)
+
+    assert [r['id'] for r in app.load_data(app.TRANSACTIONS_FILE)] == [expense(1)['id']]
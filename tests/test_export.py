@@ -0,0 +1,80 @@
+import csv
+import io
+
+import pytest
+
+from conftest import CountingProvider
+
+TRANSACTIONS = [
+    {'id': f'{i:032x}', 'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'description': f'Item {i}, "quoted"',
+     'category': 'Salary' if i % 5 == 0 else 'Groceries', 'type': 'Income' if i % 5 == 0 else 'Expense', 'amount': round(10.5 * i + 0.25, 2)}
+    for i in range(2500)
+]
+INVESTMENTS = [
+    {'id': f'{i:032x}', 'ticker': ticker, 'units': 2.5, 'purchase_price': 100.0, 'amount_invested': 250.0, 'purchase_date': '2023-06-01', 'type': 'Stocks'}
+    for i, ticker in enumerate(['TCS.NS', 'INFY.NS', 'N/A'])
+]
+
+
+@pytest.fixture
+def client(app):
+    app.save_data(TRANSACTIONS, app.TRANSACTIONS_FILE)
+    app.save_data(INVESTMENTS, app.INVESTMENTS_FILE)
+    return app.app.test_client()
+
+
+@pytest.fixture
+def pq():
+    return pytest.importorskip('pyarrow.parquet')
+
+
+def test_csv_export_round_trips_to_the_records(client):
+    response = client.get('/export?format=csv&dataset=transactions')
+
+    assert response.status_code == 200 and response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [dict(row, amount=float(row['amount'])) for row in rows] == TRANSACTIONS
+
+
+def test_parquet_export_round_trips_to_the_records(client, pq):
+    response = client.get('/export?format=parquet&dataset=transactions')
+
+    assert response.status_code == 200
+    assert pq.read_table(io.BytesIO(response.get_data())).to_pylist() == TRANSACTIONS
+
+
+def test_investment_exports_carry_cached_prices(app, client, pq):
+    app.quote_cache.put('TCS.NS', 120.0)
+
+    rows = pq.read_table(io.BytesIO(client.get('/export?format=parquet&dataset=investments').get_data())).to_pylist()
+
+    assert [{k: row[k] for k in INVESTMENTS[0]} for row in rows] == INVESTMENTS
+    prices = {row['ticker']: (row['current_price'], row['current_value'], row['price_stale']) for row in rows}
+    assert prices == {'TCS.NS': (120.0, 300.0, False), 'INFY.NS': (100.0, 250.0, True), 'N/A': (1.0, 2.5, False)}
+
+
+def test_empty_dataset_exports_no_rows(app, client, pq):
+    app.save_data([], app.TRANSACTIONS_FILE)
+
+    assert client.get('/export?format=csv&dataset=transactions').get_data(as_text=True).strip() == ''
+    assert pq.read_table(io.BytesIO(client.get('/export?format=parquet&dataset=transactions').get_data())).num_rows == 0
+
+
+def test_parquet_export_without_pyarrow_is_an_error(app, client, monkeypatch):
+    monkeypatch.setattr(app, 'pq', None)
+
+    response = client.get('/export?format=parquet&dataset=transactions')
+
+    assert response.status_code == 501 and 'pyarrow' in response.get_json()['error']
+
+
+def test_refresh_fetches_every_ticker_past_the_cache(app, client, monkeypatch, pq):
+    app.quote_cache.put('TCS.NS', 120.0)
+    provider = CountingProvider({'TCS.NS': 130.0, 'INFY.NS': 140.0})
+    monkeypatch.setattr(app, 'quote_provider', provider)
+
+    rows = pq.read_table(io.BytesIO(client.get('/export?format=parquet&dataset=investments&refresh=1').get_data())).to_pylist()
+
+    assert provider.quote_calls == [['INFY.NS', 'TCS.NS']]
+    assert {row['ticker']: row['current_price'] for row in rows} == {'TCS.NS': 130.0, 'INFY.NS': 140.0, 'N/A': 1.0}
+    assert app.quote_cache.get('TCS.NS')[0] == 130.0
@@ -0,0 +1,28 @@
+import io
+
+
+STATEMENT = 'Date,Description,Amount,Category\n2024-03-05,Salary,"1,000.00",Pay\n2024-03-06,Coffee,(4.50),\n,Missing date,1.00,\n'
+
+
+def test_statement_rows_become_transactions(app):
+    records, skipped = app.parse_statement(io.StringIO(STATEMENT), columns={'category': 'Category'})
+
+    assert skipped == 1
+    assert [{k: r[k] for k in ('date', 'description', 'category', 'type', 'amount')} for r in records] == [
+        {'date': '2024-03-05', 'description': 'Salary', 'category': 'Pay', 'type': 'Income', 'amount': 1000.0},
+        {'date': '2024-03-06', 'description': 'Coffee', 'category': 'Other Expense', 'type': 'Expense', 'amount': 4.5},
+    ]
+
+
+def test_blank_optional_columns_mean_none(app):
+    statement = 'Date,Amount\n2024-03-05,12.00\n'
+
+    records, _ = app.parse_statement(io.StringIO(statement), columns={'description': '', 'category': ''})
+
+    assert [(r['description'], r['category']) for r in records] == [('', 'Other Income')]
+
+
+def test_blank_required_columns_keep_their_defaults(app):
+    records, _ = app.parse_statement(io.StringIO(STATEMENT), columns={'date': '', 'amount': ''})
+
+    assert [r['amount'] for r in records] == [1000.0, 4.5]
@@ -0,0 +1,87 @@
+import threading
+
+from conftest import CountingProvider
+
+
+def hold(app, *tickers):
+    app.save_data([{'id': f'{i:032x}', 'ticker': t, 'units': 1, 'purchase_price': 1.0, 'amount_invested': 1.0,
+                    'purchase_date': '2024-01-01'} for i, t in enumerate(tickers)], app.INVESTMENTS_FILE)
+
+
+def test_refresh_fetches_held_tickers_in_one_call(app, clock):
+    hold(app, 'TCS.NS', 'INFY.NS', 'TCS.NS', 'N/A')
+    provider = CountingProvider({'TCS.NS': 3500.0, 'INFY.NS': 1500.0})
+    refresher = app.QuoteRefresher(interval=60, provider=provider, clock=clock)
+
+    assert refresher.refresh()
+    assert provider.quote_calls == [['INFY.NS', 'TCS.NS']]
+    assert dict(refresher.snapshot) == {'TCS.NS': (3500.0, clock.now), 'INFY.NS': (1500.0, clock.now)}
+    assert refresher.refresh_count == 1 and refresher.last_refresh == clock.now
+    assert app.quote_cache.get('TCS.NS') is not None
+
+
+def test_refresh_without_holdings_skips_the_provider(app, clock):
+    hold(app, 'N/A')
+    provider = CountingProvider({})
+    refresher = app.QuoteRefresher(interval=60, provider=provider, clock=clock)
+
+    assert not refresher.refresh()
+    assert provider.quote_calls == []
+    assert dict(refresher.snapshot) == {}
+
+
+def test_quotes_are_served_from_the_snapshot(app, clock):
+    hold(app, 'TCS.NS')
+    provider = CountingProvider({'TCS.NS': 3500.0})
+    refresher = app.QuoteRefresher(interval=60, provider=provider, clock=clock)
+    refresher.refresh()
+    clock.advance(30)
+
+    assert refresher.quotes(['TCS.NS', 'N/A']) == {'TCS.NS': (3500.0, clock.now - 30, False), 'N/A': (1.0, clock.now, False)}
+    assert len(provider.quote_calls) == 1
+
+
+def test_skipped_ticker_keeps_its_last_quote_and_turns_stale(app, clock):
+    hold(app, 'TCS.NS', 'INFY.NS')
+    provider = CountingProvider({'TCS.NS': 3500.0, 'INFY.NS': 1500.0})
+    refresher = app.QuoteRefresher(interval=60, provider=provider, clock=clock)
+    refresher.refresh()
+    fetched_at = clock.now
+
+    del provider.prices['INFY.NS']
+    clock.advance(60)
+    refresher.refresh()
+    assert refresher.quotes(['INFY.NS'])['INFY.NS'] == (1500.0, fetched_at, False)
+
+    clock.advance(61)
+    refresher.refresh()
+    assert refresher.quotes(['INFY.NS'])['INFY.NS'] == (1500.0, fetched_at, True)
+    assert refresher.quotes(['TCS.NS'])['TCS.NS'] == (3500.0, clock.now, False)
+
+
+def test_missing_ticker_wakes_the_background_thread(app, clock):
+    hold(app, 'TCS.NS')
+    refreshed = threading.Event()
+
+    class Provider(CountingProvider):
+        def get_quotes(self, tickers):
+            try:
+                return super().get_quotes(tickers)
+            finally:
+                refreshed.set()
+
+    provider = Provider({'TCS.NS': 3500.0, 'INFY.NS': 1500.0})
+    refresher = app.QuoteRefresher(interval=3600, provider=provider, clock=clock)
+    refresher.start()
+    try:
+        assert refreshed.wait(5) and refresher.running
+        refreshed.clear()
+        hold(app, 'TCS.NS', 'INFY.NS')
+
+        assert 'INFY.NS' not in refresher.quotes(['TCS.NS', 'INFY.NS'])
+        assert refreshed.wait(5)
+        assert provider.quote_calls[-1] == ['INFY.NS', 'TCS.NS']
+    finally:
+        refresher.stop()
+    assert not refresher.running
+    assert refresher.stats()['refresh_count'] == 2
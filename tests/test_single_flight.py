@@ -0,0 +1,86 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from conftest import CountingProvider, run_concurrently
+
+TICKERS = ['INFY.NS', 'TCS.NS', 'WIPRO.NS']
+
+
+def business_days(start):
+    """'YYYY-MM-DD' weekdays from start through today."""
+    day, today = datetime.strptime(start, '%Y-%m-%d'), datetime.now()
+    while day <= today:
+        if day.weekday() < 5: yield day.strftime('%Y-%m-%d')
+        day += timedelta(days=1)
+
+
+def test_concurrent_live_quotes_fetch_each_ticker_once(app, monkeypatch):
+    provider = CountingProvider({'INFY.NS': 1500.0, 'TCS.NS': 3500.0, 'WIPRO.NS': 450.0}, latency=0.2)
+    monkeypatch.setattr(app, 'quote_provider', provider)
+
+    results = run_concurrently(lambda i: app.get_live_quotes(TICKERS))
+
+    assert Counter(t for call in provider.quote_calls for t in call) == Counter(TICKERS)
+    for quotes in results:
+        assert {t: q[0] for t, q in quotes.items()} == provider.prices
+
+
+def test_concurrent_historical_prices_fetch_each_ticker_once(app, monkeypatch):
+    history = {t: {d: 110.0 + i if d == '2024-03-05' else 100.0 + i for d in business_days('2023-01-02')} for i, t in enumerate(TICKERS)}
+    provider = CountingProvider({}, history=history, latency=0.2)
+    monkeypatch.setattr(app, 'quote_provider', provider)
+
+    results = run_concurrently(lambda i: [app.get_historical_price(t, '2024-03-05') for t in TICKERS])
+
+    assert Counter(call[0] for call in provider.history_calls) == Counter(TICKERS)
+    assert all(prices == [110.0, 111.0, 112.0] for prices in results)
+
+
+def test_todays_bar_is_refetched_once_it_expires(app, monkeypatch, clock):
+    # BTC-USD has no known session, so today's bar expires after the plain quote TTL.
+    today = datetime.now().strftime('%Y-%m-%d')
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    provider = CountingProvider({}, history={'BTC-USD': {yesterday: 100.0, today: 101.0}})
+    monkeypatch.setattr(app, 'quote_provider', provider)
+    store = app.PriceStore(app.PRICES_DB_FILE, clock=clock)
+
+    store.ensure_range('BTC-USD', yesterday, tomorrow)
+    assert store.covered('BTC-USD')[1] == today
+    assert store.closes('BTC-USD', yesterday, tomorrow) == {yesterday: 100.0, today: 101.0}
+
+    provider.history['BTC-USD'][today] = 102.0
+    store.ensure_range('BTC-USD', yesterday, tomorrow)
+    assert len(provider.history_calls) == 1
+
+    clock.advance(app.QUOTE_TTL_SECONDS + 1)
+    store.ensure_range('BTC-USD', yesterday, tomorrow)
+    assert provider.history_calls[-1] == ('BTC-USD', today, tomorrow)
+    assert store.closes('BTC-USD', today, tomorrow) == {today: 102.0}
+
+    store.ensure_range('BTC-USD', yesterday, today)
+    assert len(provider.history_calls) == 2
+
+
+def test_failed_download_is_not_recorded_as_covered(app, monkeypatch):
+    # yfinance reports a failed download as an empty result rather than an error.
+    provider = CountingProvider({}, history={'TCS.NS': {}})
+    monkeypatch.setattr(app, 'quote_provider', provider)
+
+    assert app.get_historical_price('TCS.NS', '2024-03-05') is None
+    assert app.price_store.covered('TCS.NS') is None
+
+    provider.history['TCS.NS'] = {d: 3500.0 for d in business_days('2024-01-01')}
+    assert app.get_historical_price('TCS.NS', '2024-03-05') == 3500.0
+    assert len(provider.history_calls) == 2
+    assert app.price_store.covered('TCS.NS')[0] == '2024-01-01'
+
+
+def test_coverage_is_limited_to_the_dates_that_came_back(app, monkeypatch):
+    provider = CountingProvider({}, history={'NEWCO.NS': {d: 50.0 for d in business_days('2024-03-01')}})
+    monkeypatch.setattr(app, 'quote_provider', provider)
+
+    assert app.get_historical_price('NEWCO.NS', '2024-03-05') == 50.0
+    assert app.price_store.covered('NEWCO.NS')[0] == '2024-03-01'
+    assert app.get_historical_price('NEWCO.NS', '2024-03-11') == 50.0
+    assert len(provider.history_calls) == 1
@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.mark.parametrize('stream', [0, 1])
+def test_flash_message_is_shown_once(app, stream):
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session['_flashes'] = [('success', 'Transaction deleted successfully.')]
+
+    first = client.get(f'/transactions?stream={stream}')
+    second = client.get(f'/transactions?stream={stream}')
+
+    assert 'Transaction deleted successfully.' in first.get_data(as_text=True)
+    assert 'Transaction deleted successfully.' not in second.get_data(as_text=True)
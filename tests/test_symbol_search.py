@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+SYMBOLS = [
+    ('TCS.NS', 'Tata Consultancy Services Limited'),
+    ('TCS.BO', 'Tata Consultancy Services Limited'),
+    ('M&M.NS', 'Mahindra & Mahindra Limited'),
+    ('INFY.NS', 'Infosys Limited'),
+]
+
+
+@pytest.fixture
+def index(app):
+    index = app.SymbolIndex()
+    index.loaded = True
+    for ticker, name in SYMBOLS: index.add(ticker, name)
+    return index
+
+
+@pytest.mark.parametrize('query, tickers', [
+    ('tcs.ns', ['TCS.NS']),
+    ('TCS.B', ['TCS.BO']),
+    ('m&m', ['M&M.NS']),
+    ('tcs', ['TCS.BO', 'TCS.NS']),
+    ('tata consultancy', ['TCS.BO', 'TCS.NS']),
+    ('infy.bo', []),
+])
+def test_search_matches_tickers_with_their_suffix(index, query, tickers):
+    assert [r['ticker'] for r in index.search(query)] == tickers
+
+
+def test_search_while_learning(index):
+    learned = [{'ticker': f'SYM{i}.NS', 'name': f'Symbol {i} Limited'} for i in range(500)]
+    errors = []
+
+    def search():
+        try:
+            for _ in range(200): index.search('sym')
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    for r in readers: r.start()
+    for i in range(0, len(learned), 10): index.learn(learned[i:i + 10])
+    for r in readers: r.join(10)
+
+    assert errors == []
+    assert [r['ticker'] for r in index.search('sym499.ns')] == ['SYM499.NS']